@@ -1,10 +1,12 @@
+import functions.threads  # cap the BLAS threads before numpy is imported
 # --- external imports
+import os
 import numpy as np
 import matplotlib.pyplot as plt
 from mpl_toolkits.mplot3d import axes3d
 from prettytable import PrettyTable
 from tqdm import tqdm
-import warnings
+from concurrent.futures import ThreadPoolExecutor
 # --- internal imports
 import functions.band_structure as fbs
 import functions.arguments as fa
@@ -32,6 +34,7 @@ if __name__ == '__main__':
     period = args['periodicity']
     dpi = args['dpi']
     ps = args['point_size']
+    prec = args['precision']
     # band_structure arguments
     samp = args['samp']
     wil = args['wilson']
@@ -51,8 +54,9 @@ if __name__ == '__main__':
                 'wilson_loops': None}
 
         # construct model
+        dtype = np.complex64 if prec == "single" else np.complex128
         if mod == "Hofstadter":
-            model = Hofstadter(nphi[0], nphi[1], a0=a, t=t, lat=lat, alpha=alpha, theta=theta, period=period)
+            model = Hofstadter(nphi[0], nphi[1], a0=a, t=t, lat=lat, alpha=alpha, theta=theta, period=period, dtype=dtype)
         else:
             raise ValueError("model is not defined")
 
@@ -64,37 +68,35 @@ if __name__ == '__main__':
         if disp == "3D" or disp == "both" or any(topology_columns) or any(geometry_columns):
             # construct bands
             data['eigenvalues'] = np.zeros((num_bands, samp, samp))  # real
-            data['eigenvectors'] = np.zeros((num_bands, num_bands, samp, samp), dtype=np.complex128)  # complex
+            data['eigenvectors'] = np.zeros((num_bands, num_bands, samp, samp), dtype=model.dtype)  # complex
             if any(geometry_columns):
-                data['eigenvectors_dkx'] = np.zeros((num_bands, num_bands, samp, samp), dtype=np.complex128)  # complex
-                data['eigenvectors_dky'] = np.zeros((num_bands, num_bands, samp, samp), dtype=np.complex128)  # complex
+                data['eigenvectors_dkx'] = np.zeros((num_bands, num_bands, samp, samp), dtype=model.dtype)  # complex
+                data['eigenvectors_dky'] = np.zeros((num_bands, num_bands, samp, samp), dtype=model.dtype)  # complex
                 data['Dkx'] = np.dot(np.array([1/(samp-1), 0]), bMUCvec[0])
                 data['Dky'] = np.dot(np.array([0, 1/(samp-1)]), bMUCvec[1])
-            for band in tqdm(range(num_bands), desc="Band Construction", ascii=True):
-                for idx_x in range(samp):
-                    frac_kx = idx_x / (samp-1)
-                    if any(geometry_columns):
-                        frac_kx_dkx = (frac_kx + 1/(1000*(samp-1))) % 1
-                    for idx_y in range(samp):
-                        frac_ky = idx_y / (samp-1)
-                        k = np.matmul(np.array([frac_kx, frac_ky]), bMUCvec)
-                        ham = model.hamiltonian(k)
-                        eigvals, eigvecs = np.linalg.eigh(ham)
-                        idx = np.argsort(eigvals)
-                        data['eigenvalues'][band, idx_x, idx_y] = eigvals[idx[band]]
-                        data['eigenvectors'][:, band, idx_x, idx_y] = eigvecs[:, idx[band]]
-                        if any(geometry_columns):
-                            frac_ky_dky = (frac_ky + 1/(1000*(samp-1))) % 1
-                            k_dkx = np.matmul(np.array([frac_kx_dkx, frac_ky]), bMUCvec)
-                            k_dky = np.matmul(np.array([frac_kx, frac_ky_dky]), bMUCvec)
-                            ham_dkx = model.hamiltonian(k_dkx)
-                            eigvals_dkx, eigvecs_dkx = np.linalg.eigh(ham_dkx)
-                            ham_dky = model.hamiltonian(k_dky)
-                            eigvals_dky, eigvecs_dky = np.linalg.eigh(ham_dky)
-                            idx_dkx = np.argsort(eigvals_dkx)
-                            idx_dky = np.argsort(eigvals_dky)
-                            data['eigenvectors_dkx'][:, band, idx_x, idx_y] = eigvecs_dkx[:, idx_dkx[band]]
-                            data['eigenvectors_dky'][:, band, idx_x, idx_y] = eigvecs_dky[:, idx_dky[band]]
+            # diagonalize the Hamiltonians for a full row of the momentum grid in a single batched call
+            frac_ky = np.arange(samp) / (samp-1)
+
+            def diagonalize_row(idx_x):
+                frac_kx = np.full(samp, idx_x / (samp-1))
+                k = np.matmul(np.column_stack((frac_kx, frac_ky)), bMUCvec)
+                eigvals, eigvecs = np.linalg.eigh(model.hamiltonian(k))  # sorted in ascending order
+                data['eigenvalues'][:, idx_x, :] = eigvals.T
+                data['eigenvectors'][:, :, idx_x, :] = np.transpose(eigvecs, (1, 2, 0))
+                if any(geometry_columns):
+                    frac_kx_dkx = (frac_kx + 1/(1000*(samp-1))) % 1
+                    frac_ky_dky = (frac_ky + 1/(1000*(samp-1))) % 1
+                    k_dkx = np.matmul(np.column_stack((frac_kx_dkx, frac_ky)), bMUCvec)
+                    k_dky = np.matmul(np.column_stack((frac_kx, frac_ky_dky)), bMUCvec)
+                    _, eigvecs_dkx = np.linalg.eigh(model.hamiltonian(k_dkx))
+                    _, eigvecs_dky = np.linalg.eigh(model.hamiltonian(k_dky))
+                    data['eigenvectors_dkx'][:, :, idx_x, :] = np.transpose(eigvecs_dkx, (1, 2, 0))
+                    data['eigenvectors_dky'][:, :, idx_x, :] = np.transpose(eigvecs_dky, (1, 2, 0))
+
+            # the rows are independent and numpy releases the GIL in eigh, so they are distributed over threads
+            model.hamiltonian(np.zeros(2))  # populate the model caches before threading
+            with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+                list(tqdm(executor.map(diagonalize_row, range(samp)), total=samp, desc="Band Construction", ascii=True))
 
         if disp == "2D" or disp == "both":
             # construct bands
@@ -102,18 +104,13 @@ if __name__ == '__main__':
             points_per_path = int(samp / num_paths)
             num_points = num_paths * points_per_path
             data['eigenvalues_2D'] = np.zeros((num_bands, num_points))  # real
-            count = 0
+            # diagonalize the Hamiltonians along each path in a single batched call
+            frac_path = np.arange(points_per_path) / (points_per_path - 1)
             for i in range(num_paths):
-                for j in range(points_per_path):
-                    k = sym_points[i][1] + (sym_points[(i + 1) % num_paths][1] - sym_points[i][1]) * float(j) / float(
-                        points_per_path - 1)
-                    k = np.matmul(k, bMUCvec)
-                    ham = model.hamiltonian(k)
-                    eigvals = np.linalg.eigvalsh(ham)
-                    idx = np.argsort(eigvals)
-                    for band in range(num_bands):
-                        data['eigenvalues_2D'][band, count] = np.real(eigvals[idx[band]])
-                    count += 1
+                k = sym_points[i][1] + np.multiply.outer(frac_path, sym_points[(i + 1) % num_paths][1] - sym_points[i][1])
+                k = np.matmul(k, bMUCvec)
+                eigvals = np.linalg.eigvalsh(model.hamiltonian(k))  # sorted in ascending order
+                data['eigenvalues_2D'][:, i*points_per_path:(i+1)*points_per_path] = eigvals.T
     else:  # load from file
         model, args_load, data = fu.load_data("band_structure", load)
 
@@ -169,41 +166,32 @@ if __name__ == '__main__':
             fs_metric = np.zeros((num_bands, samp - 1, samp - 1, 2, 2))  # real
             berry_fluxes_2 = np.zeros((num_bands, samp - 1, samp - 1))  # real
             TISM, DISM = np.zeros((2, num_bands, samp - 1, samp - 1))  # real
+        # compute the band properties on every plaquette of the momentum grid at once
+        idx_x, idx_y = np.meshgrid(np.arange(samp - 1), np.arange(samp - 1), indexing='ij')
         for band, group in tqdm(enumerate(band_group), desc="Band Properties", ascii=True):
             group_size = np.count_nonzero(band_group == group)
-            for idx_y in range(samp - 1):
+            if group != band_group[band - 1]:
                 if wil:
-                    if group != band_group[band - 1]:
-                        data['wilson_loops'][band, idx_y] = fbs.wilson_loop(data['eigenvectors'], band, idx_y,
-                                                                            group_size)
-                    else:
-                        data['wilson_loops'][band, idx_y] = data['wilson_loops'][band - 1, idx_y]
-                for idx_x in range(samp - 1):
-                    if group != band_group[band - 1]:
-                        berry_fluxes[band, idx_x, idx_y] = fbs.berry_curv(data['eigenvectors'], band, idx_x, idx_y, group_size)
-                        # quantum geometry
-                        if any(geometry_columns):
-                            geom_tensor = fbs.geom_tensor(data['eigenvectors'], data['eigenvectors_dkx'], data['eigenvectors_dky'], bMUCvec, band, idx_x, idx_y, group_size)
-                            fs_metric[band, idx_x, idx_y] = np.real(geom_tensor)
-                            berry_curv = -2 * np.imag(geom_tensor)
-                            ###
-                            berry_fluxes_2[band, idx_x, idx_y] = berry_curv[0][1]
-                            TISM[band, idx_x, idx_y] = np.trace(fs_metric[band, idx_x, idx_y]) \
-                                                       - np.abs(berry_fluxes_2[band, idx_x, idx_y])
-                            DISM[band, idx_x, idx_y] = np.linalg.det(fs_metric[band, idx_x, idx_y]) \
-                                                       - 0.25 * np.abs(berry_fluxes_2[band, idx_x, idx_y])**2
-                    else:
-                        berry_fluxes[band, idx_x, idx_y] = berry_fluxes[band-1, idx_x, idx_y]
-                        if any(geometry_columns):
-                            fs_metric[band, idx_x, idx_y] = fs_metric[band-1, idx_x, idx_y]
-                            berry_fluxes_2[band, idx_x, idx_y] = berry_fluxes_2[band-1, idx_x, idx_y]
-                            TISM[band, idx_x, idx_y] = TISM[band-1, idx_x, idx_y]
-                            DISM[band, idx_x, idx_y] = DISM[band-1, idx_x, idx_y]
-            if wil:
-                if group != band_group[band - 1]:
-                    data['wilson_loops'][band, samp-1] = fbs.wilson_loop(data['eigenvectors'], band, samp-1, group_size)
-                else:
-                    data['wilson_loops'][band, samp-1] = data['wilson_loops'][band - 1, samp-1]
+                    data['wilson_loops'][band] = fbs.wilson_loop(data['eigenvectors'], band, np.arange(samp), group_size)
+                berry_fluxes[band] = fbs.berry_curv(data['eigenvectors'], band, idx_x, idx_y, group_size)
+                # quantum geometry
+                if any(geometry_columns):
+                    geom_tensor = fbs.geom_tensor(data['eigenvectors'], data['eigenvectors_dkx'], data['eigenvectors_dky'], bMUCvec, band, idx_x, idx_y, group_size)
+                    fs_metric[band] = np.real(geom_tensor)
+                    berry_curv = -2 * np.imag(geom_tensor)
+                    ###
+                    berry_fluxes_2[band] = berry_curv[..., 0, 1]
+                    TISM[band] = np.trace(fs_metric[band], axis1=-2, axis2=-1) - np.abs(berry_fluxes_2[band])
+                    DISM[band] = np.linalg.det(fs_metric[band]) - 0.25 * np.abs(berry_fluxes_2[band])**2
+            else:
+                if wil:
+                    data['wilson_loops'][band] = data['wilson_loops'][band - 1]
+                berry_fluxes[band] = berry_fluxes[band - 1]
+                if any(geometry_columns):
+                    fs_metric[band] = fs_metric[band - 1]
+                    berry_fluxes_2[band] = berry_fluxes_2[band - 1]
+                    TISM[band] = TISM[band - 1]
+                    DISM[band] = DISM[band - 1]
 
     # band properties
     band_width = np.zeros(num_bands)
@@ -1,16 +1,12 @@
+import functions.threads  # cap the BLAS threads before numpy is imported
 # --- external imports
+import os
 import numpy as np
 import matplotlib.pyplot as plt
 from tqdm import tqdm
-from math import gcd
-import matplotlib.ticker as ticker
-from fractions import Fraction
-from matplotlib.ticker import MaxNLocator
-from copy import deepcopy
-import matplotlib.colors as mcolors
-import os
 import sys
 import warnings
+from concurrent.futures import ThreadPoolExecutor
 # --- internal imports
 import functions.arguments as fa
 import functions.butterfly as fb
@@ -36,98 +32,117 @@ if __name__ == '__main__':
     period = args['periodicity']
     dpi = args['dpi']
     ps = args['point_size']
+    prec = args['precision']
     # butterfly arguments
     q = args['q']
     col = args['color']
     pal = args['palette']
     wan = args['wannier']
     art = args['art']
+    load = args['load']
 
     # initialize logger
     if log:
         sys.stdout = sys.stderr = fu.Logger("butterfly", args)
 
-    # initialize data array
-    data = {'nphi_list': [], 'E_list': [],
-            'chern_list': [], 'tr_list': [],
-            'nphi_DOS_list': [], 'DOS_list': [], 'gaps_list': [], 'tr_DOS_list': [],
-            'E_list_orig': [], 'matrix': None}
-
-    # construct butterfly
-    for p in tqdm(range(1, q), desc="Butterfly Construction", ascii=True):
-
-        # construct model
-        if mod == "Hofstadter":
-            model = Hofstadter(p, q, a0=a, t=t, lat=lat, alpha=alpha, theta=theta, period=period)
-        else:
-            raise ValueError("model is not defined")
-
-        # define flux density
-        if gcd(p, q) != 1:  # nphi must be a coprime fraction
-            continue
-        nphi = p / q
-
-        # diagonalize Hamiltonian
-        ham = model.hamiltonian(np.array([0, 0]))
-        M = len(ham)
-        data['nphi_list'].append([nphi] * M)
-        lmbda = np.sort(np.linalg.eigvalsh(ham))
-        data['E_list'].append(lmbda)
-
-        # Wannier diagram data lists
-        if wan:
-            data['nphi_DOS_list'].append([nphi] * (M-1))
-            data['DOS_list'].append([i/M for i in range(M-1)])
-            data['gaps_list'].append([lmbda[i+1] - lmbda[i] for i in range(M-1)])
-
-        # color data lists
-        if col:
-            cherns, trs = fb.chern(p, q)
-            if round(M/q) == 2 and len(t) == 1:  # NN honeycomb
-                cherns_double = cherns + [i for i in cherns[::-1]]
-                data['chern_list'].append(cherns_double)
-                trs_double = trs + [-i for i in trs[::-1]]
-                data['tr_list'].append(trs_double)
-                if wan:
-                    trs_double_wan = trs[1:] + [-i for i in trs[::-1]][1:]
-                    data['tr_DOS_list'].append(trs_double_wan[:-1])
-            elif round(M/q) == 1:
-                data['chern_list'].append(cherns)
-                data['tr_list'].append(trs)
-                if wan:
-                    data['tr_DOS_list'].append(trs[1:-1])
+    if not load:
+        # initialize data array
+        data = {'nphi_list': [], 'E_list': [],
+                'chern_list': [], 'tr_list': [],
+                'nphi_DOS_list': [], 'DOS_list': [], 'gaps_list': [], 'tr_DOS_list': [],
+                'E_list_orig': [], 'matrix': None}
+
+        # construct butterfly
+        dtype = np.complex64 if prec == "single" else np.complex128  # single precision suffices to plot the spectra
+
+        def construct_model(p_val):
+            if mod == "Hofstadter":
+                model_val = Hofstadter(p_val, q, a0=a, t=t, lat=lat, alpha=alpha, theta=theta, period=period, dtype=dtype)
             else:
-                warnings.warn("Color and wannier are only implemented for square/triangular/bravais/[honeycomb+1NN] models. Continuing without color and wannier...")
-                args['color'] = False
-                col = args['color']
-                args['wannier'] = False
-                wan = args['wannier']
-
-    # color plane data matrix
-    if col == "plane":
-        data['E_list_orig'] = deepcopy(data['E_list'])
-
-        if round(M/q) == 2 and len(t) == 1:  # NN honeycomb
-            half_len = int(np.shape(data['E_list'])[1]/2)
-            for i, val in enumerate(data['E_list']):
-                data['E_list'][i] = val[:half_len]  # consider only lower half
+                raise ValueError("model is not defined")
+
+            return model_val
+
+        ps = np.arange(1, q)
+        ps = ps[np.gcd(ps, q) == 1].tolist()  # nphi must be a coprime fraction
+        # the flux densities are independent and numpy releases the GIL in the eigensolvers, so they are distributed over threads in chunks
+        num_bands = construct_model(ps[0]).unit_cell()[0]
+        chunk_size = max(1, min(8, 2**22 // num_bands**2))  # cap each stacked batch at 2^22 matrix elements for large q
+        with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+            spectra = fb.spectra(construct_model, ps, q, chunk_size=chunk_size, map_func=executor.map)
+            for idx, (p, (model, lmbda)) in enumerate(tqdm(zip(ps, spectra), total=len(ps), desc="Butterfly Construction", ascii=True)):
+
+                # define flux density
+                nphi = p / q
+
+                M = len(lmbda)
+                if idx == 0:  # allocate the (num_p, M) data arrays once the number of bands is known
+                    data['nphi_list'], data['E_list'] = np.zeros((2, len(ps), M))
+                    if wan:
+                        data['nphi_DOS_list'], data['DOS_list'], data['gaps_list'] = np.zeros((3, len(ps), M-1))
+                data['nphi_list'][idx] = nphi
+                data['E_list'][idx] = lmbda
+
+                # Wannier diagram data arrays
+                if wan:
+                    data['nphi_DOS_list'][idx] = nphi
+                    data['DOS_list'][idx] = np.arange(M-1) / M
+                    data['gaps_list'][idx] = np.diff(lmbda)
+
+                # color data lists
+                if col:
+                    cherns, trs = fb.chern(p, q)
+                    if round(M/q) == 2 and len(t) == 1:  # NN honeycomb
+                        cherns_double = np.concatenate((cherns, cherns[::-1]))
+                        data['chern_list'].append(cherns_double)
+                        trs_double = np.concatenate((trs, np.negative(trs[::-1])))
+                        data['tr_list'].append(trs_double)
+                        if wan:
+                            trs_double_wan = np.concatenate((trs[1:], np.negative(trs[::-1][1:])))
+                            data['tr_DOS_list'].append(trs_double_wan[:-1])
+                    elif round(M/q) == 1:
+                        data['chern_list'].append(cherns)
+                        data['tr_list'].append(trs)
+                        if wan:
+                            data['tr_DOS_list'].append(trs[1:-1])
+                    else:
+                        warnings.warn("Color and wannier are only implemented for square/triangular/bravais/[honeycomb+1NN] models. Continuing without color and wannier...")
+                        args['color'] = False
+                        col = args['color']
+                        args['wannier'] = False
+                        wan = args['wannier']
+                        data['nphi_DOS_list'], data['DOS_list'], data['gaps_list'] = [], [], []
+
+        # color plane data matrix
+        if col == "plane":
+            data['E_list_orig'] = data['E_list'].copy()
+
+            if round(M/q) == 2 and len(t) == 1:  # NN honeycomb
+                half_len = int(np.shape(data['E_list'])[1]/2)
+                data['E_list'] = data['E_list'][:, :half_len]  # consider only lower half
 
-        resx = np.shape(data['E_list'])[0]
-        resy = np.shape(data['E_list'])[1]
-        res = [resx, resy]
+            resx = np.shape(data['E_list'])[0]
+            resy = np.shape(data['E_list'])[1]
+            res = [resx, resy]
 
-        E_vals = np.linspace(np.min(data['E_list']), np.max(data['E_list']), res[1])  # energy bins
-        data['matrix'] = np.zeros((res[0], res[1]))
+            E_vals = np.linspace(np.min(data['E_list']), np.max(data['E_list']), res[1])  # energy bins
+            data['matrix'] = np.zeros((res[0], res[1]))
 
-        for i, p in enumerate(range(1, res[0]+1)):  # p goes from 1 to 199
-            for j, E in enumerate(E_vals):  # E goes through energy bins
-                for k, El in enumerate(data['E_list'][i]):  # for each energy bin, compare it to the E_list
-                    if E <= El:  # if energy is lower than sorted E_list value
-                        data['matrix'][i][j] = data['tr_list'][i][k]  # assign the corresponding tr of that E_list value
-                        break
+            for i, val in enumerate(data['E_list']):
+                # for each energy bin, find the first sorted E_list value that the energy is lower than or equal to
+                idx = np.searchsorted(val, E_vals, side='left')
+                found = idx < len(val)
+                data['matrix'][i][found] = np.asarray(data['tr_list'][i])[idx[found]]  # assign the corresponding tr of that E_list value
 
-        if round(M/q) == 2 and len(t) == 1:  # NN honeycomb
-            data['matrix'] = np.concatenate((data['matrix'], -data['matrix'][:, ::-1]), axis=1)  # double the spectrum
+            if round(M/q) == 2 and len(t) == 1:  # NN honeycomb
+                data['matrix'] = np.concatenate((data['matrix'], -data['matrix'][:, ::-1]), axis=1)  # double the spectrum
+    else:  # load from file
+        model, args_load, data = fu.load_data("butterfly", load)
+
+        # fix the arguments that define the data
+        for key in ['model', 'a', 't', 'input', 'lattice', 'alpha', 'theta', 'periodicity', 'q', 'color', 'wannier']:
+            args[key] = args_load[key]
+        args['precision'] = args_load.get('precision', 'double')  # older files do not store the precision
 
     # save data
     if save:
@@ -1,6 +1,7 @@
 """Functions for argument parsing."""
 
 import argparse
+from functools import lru_cache
 
 
 def parse_input_arguments(program, description):
@@ -22,11 +23,30 @@ def parse_input_arguments(program, description):
         The dictionary of input arguments.
     """
 
+    parser = _build_parser(program, description)
+    args = vars(parser.parse_args())
+
+    return args
+
+
+@lru_cache(maxsize=None)
+def _build_parser(program, description):
+    """Build the argument parser for a given program, registering only the options that it uses."""
+
     parser = argparse.ArgumentParser(prog=program, description=description, formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    _build_common(parser)
+    if program == "band_structure":
+        _build_band_structure(parser)
+    elif program == "butterfly":
+        _build_butterfly(parser)
+
+    return parser
+
+
+def _build_common(parser):
+    """Add the general options, shared by all programs, to the parser."""
 
     general = parser.add_argument_group("general options")
-    band_structure = parser.add_argument_group("band_structure options")
-    butterfly = parser.add_argument_group("butterfly options")
 
     models = ["Hofstadter"]
     general.add_argument("-mod", "--model", type=str, default="Hofstadter", choices=models, help="name of model")
@@ -43,24 +63,34 @@ def parse_input_arguments(program, description):
     general.add_argument("-period", "--periodicity", type=int, default=1, help="factor by which to divide A_UC in the flux density")
     general.add_argument("-dpi", type=int, default=300, help="dots-per-inch resolution of the saved output image")
     general.add_argument("-ps", "--point_size", type=float, default=1, help="scale factor by which to scale the default point size")
+    precisions = ["double", "single"]
+    general.add_argument("-prec", "--precision", type=str, default="double", choices=precisions, help="floating-point precision of the Hamiltonians")
 
-    if program == "band_structure":
-        band_structure.add_argument("-samp", type=int, default=101, help="number of samples in linear direction")
-        band_structure.add_argument("-wil", "--wilson", default=False, action='store_true', help="plot the wilson loops")
-        displays = ["3D", "2D", "both"]
-        band_structure.add_argument("-disp", "--display", type=str, default="3D", choices=displays, help="how to display band structure")
-        band_structure.add_argument("-nphi", nargs=2, type=int, default=[1, 4], help="flux density")
-        band_structure.add_argument("-bgt", type=float, default=0.01, help="band gap threshold")
-        band_structure.add_argument("-load", type=str, default=False, help="load data from file")
-    if program == "butterfly":
-        butterfly.add_argument("-q", type=int, default=199, help="denominator of flux density (prime integer)")
-        colors = [False, "point", "plane"]
-        butterfly.add_argument("-col", "--color", type=str, default=False, choices=colors, help="how to color the Hofstadter butterfly")
-        palettes = ["avron", "jet", "red-blue"]
-        butterfly.add_argument("-pal", "--palette", type=str, default="avron", choices=palettes, help="color palette")
-        butterfly.add_argument("-wan", "--wannier", default=False, action='store_true', help="plot the Wannier diagram")
-        butterfly.add_argument("-art", default=False, action='store_true', help="remove all plot axes and labels")
 
-    args = vars(parser.parse_args())
+def _build_band_structure(parser):
+    """Add the band_structure options to the parser."""
 
-    return args
+    band_structure = parser.add_argument_group("band_structure options")
+
+    band_structure.add_argument("-samp", type=int, default=101, help="number of samples in linear direction")
+    band_structure.add_argument("-wil", "--wilson", default=False, action='store_true', help="plot the wilson loops")
+    displays = ["3D", "2D", "both"]
+    band_structure.add_argument("-disp", "--display", type=str, default="3D", choices=displays, help="how to display band structure")
+    band_structure.add_argument("-nphi", nargs=2, type=int, default=[1, 4], help="flux density")
+    band_structure.add_argument("-bgt", type=float, default=0.01, help="band gap threshold")
+    band_structure.add_argument("-load", type=str, default=False, help="load data from file")
+
+
+def _build_butterfly(parser):
+    """Add the butterfly options to the parser."""
+
+    butterfly = parser.add_argument_group("butterfly options")
+
+    butterfly.add_argument("-q", type=int, default=199, help="denominator of flux density (prime integer)")
+    colors = [False, "point", "plane"]
+    butterfly.add_argument("-col", "--color", type=str, default=False, choices=colors, help="how to color the Hofstadter butterfly")
+    palettes = ["avron", "jet", "red-blue"]
+    butterfly.add_argument("-pal", "--palette", type=str, default="avron", choices=palettes, help="color palette")
+    butterfly.add_argument("-wan", "--wannier", default=False, action='store_true', help="plot the Wannier diagram")
+    butterfly.add_argument("-art", default=False, action='store_true', help="remove all plot axes and labels")
+    butterfly.add_argument("-load", type=str, default=False, help="load data from file")
@@ -1,7 +1,6 @@
 """Functions for band structure calculations."""
 
 import numpy as np
-import cmath as cm
 
 
 def _principal(z):
@@ -10,23 +9,16 @@ def _principal(z):
 
     Parameters
     ----------
-    z: complex
-        The original complex number.
+    z: complex or ndarray
+        The original complex number(s).
 
     Returns
     -------
-    z: complex
-        The principal value of the complex number.
+    z: complex or ndarray
+        The principal value of the complex number(s).
     """
 
-    re = np.real(z)
-    im = np.imag(z)
-    if im <= -np.pi:
-        z = re + 1j * (np.pi - np.abs((im + np.pi)) % (2 * np.pi))
-    elif im > np.pi:
-        z = re + 1j * (-np.pi + np.abs((im + np.pi)) % (2 * np.pi))
-
-    return z
+    return np.real(z) + 1j * (np.pi - (np.pi - np.imag(z)) % (2 * np.pi))
 
 
 def U(var_num, _eigenvectors, _band, _idx_x, _idx_y, _group_size):
@@ -60,32 +52,31 @@ def U(var_num, _eigenvectors, _band, _idx_x, _idx_y, _group_size):
         The array of eigenvectors with dimension (num_bands, num_bands, num_samples, num_samples).
     _band: int
         The band number. If part of a band group, this must refer to the lowest band of the group.
-    _idx_x: int
+    _idx_x: int or ndarray
         The x-momentum, with respect to the discretized grid.
-    _idx_y: int
+    _idx_y: int or ndarray
         The y-momentum, with respect to the discretized grid.
     _group_size: int
         The number of bands in the band group.
 
     Returns
     -------
-    link_var: complex
-        The U(1) link variable.
+    link_var: complex or ndarray
+        The U(1) link variable, with the broadcast dimensions of _idx_x and _idx_y.
     """
 
     _num_samples = np.shape(_eigenvectors)[2]
 
-    link_matrix = np.zeros((_group_size, _group_size), dtype=complex)
-    for i in range(_group_size):
-        for j in range(_group_size):
-            vec1 = _eigenvectors[:, _band + i, _idx_x, _idx_y]
-            if var_num == 1:
-                vec2 = _eigenvectors[:, _band + j, (_idx_x + 1) % _num_samples, _idx_y]
-            elif var_num == 2:
-                vec2 = _eigenvectors[:, _band + j, _idx_x, (_idx_y + 1) % _num_samples]
-            else:
-                raise ValueError("link variable number must be in [1, 2].")
-            link_matrix[i, j] = np.conj(vec1).dot(vec2)
+    if var_num == 1:
+        _idx_x2, _idx_y2 = (_idx_x + 1) % _num_samples, _idx_y
+    elif var_num == 2:
+        _idx_x2, _idx_y2 = _idx_x, (_idx_y + 1) % _num_samples
+    else:
+        raise ValueError("link variable number must be in [1, 2].")
+
+    vec1 = _eigenvectors[:, _band:_band + _group_size, _idx_x, _idx_y]
+    vec2 = _eigenvectors[:, _band:_band + _group_size, _idx_x2, _idx_y2]
+    link_matrix = np.einsum('ai...,aj...->...ij', np.conj(vec1), vec2)
     link_var = np.linalg.det(link_matrix)
     return link_var
 
@@ -115,17 +106,17 @@ def berry_curv(_eigenvectors, _band, _idx_x, _idx_y, _group_size=1):
         The array of eigenvectors with dimension (num_bands, num_bands, num_samples, num_samples).
     _band: int
         The band number. If part of a band group, this must refer to the lowest band of the group.
-    _idx_x: int
+    _idx_x: int or ndarray
         The x-momentum index, with respect to the discretized grid.
-    _idx_y: int
+    _idx_y: int or ndarray
         The y-momentum index, with respect to the discretized grid.
     _group_size: int
         The number of touching bands a.k.a. number of bands in the band group (default=1).
 
     Returns
     -------
-    Berry_curv: float
-        The Berry curvature around a square plaquette.
+    Berry_curv: float or ndarray
+        The Berry curvature around a square plaquette, with the broadcast dimensions of _idx_x and _idx_y.
     """
 
     Berry_curv = - np.imag(np.log(U(1, _eigenvectors, _band, _idx_x, _idx_y, _group_size)
@@ -153,22 +144,21 @@ def wilson_loop(_eigenvectors, _band, _idx_y, _group_size=1):
         The array of eigenvectors with dimension (num_bands, num_bands, num_samples, num_samples).
     _band: int
         The band number. If part of a band group, this must refer to the lowest band of the group.
-    _idx_y: int
+    _idx_y: int or ndarray
         The y-momentum index, with respect to the discretized grid.
     _group_size: int
         The number of touching bands a.k.a. number of bands in the band group (default=1).
 
     Returns
     -------
-    Wilson_loop: complex
-        The Wilson loop term.
+    Wilson_loop: float or ndarray
+        The Wilson loop term, with the dimensions of _idx_y.
     """
 
     # print("np.shape(_eigenvectors) = ", np.shape(_eigenvectors))
     numb_kx = np.shape(_eigenvectors)[2]
-    product = 1
-    for i in range(numb_kx):
-        product *= U(1, _eigenvectors, _band, i, _idx_y, _group_size)
+    idx_x = np.arange(numb_kx).reshape((numb_kx,) + (1,) * np.ndim(_idx_y))
+    product = np.prod(U(1, _eigenvectors, _band, idx_x, _idx_y, _group_size), axis=0)
     Wilson_loop = -np.imag(np.log(product))
 
     return Wilson_loop
@@ -197,9 +187,9 @@ def geom_tensor(_eigenvectors, _eigenvectors_dkx, _eigenvectors_dky, _bvec, _ban
         The array of reciprocal lattice vectors.
     _band: int
         The band number. If part of a band group, this must refer to the lowest band of the group.
-    _idx_x: int
+    _idx_x: int or ndarray
         The x-momentum index, with respect to the discretized grid.
-    _idx_y: int
+    _idx_y: int or ndarray
         The y-momentum index, with respect to the discretized grid.
     _group_size: int
         The number of touching bands a.k.a. number of bands in the band group (default=1).
@@ -207,28 +197,29 @@ def geom_tensor(_eigenvectors, _eigenvectors_dkx, _eigenvectors_dky, _bvec, _ban
     Returns
     -------
     tensor: ndarray
-        The quantum geometric tensor with dimension (2,2).
+        The quantum geometric tensor with dimension (..., 2, 2), where the leading dimensions are the broadcast dimensions of _idx_x and _idx_y.
     """
 
     numb_samp_x = np.shape(_eigenvectors)[2]
     numb_samp_y = np.shape(_eigenvectors)[3]
 
-    tot_proj, tot_proj_dkx, tot_proj_dky = 0, 0, 0
-    for i in range(_group_size):
-        tot_proj += np.outer(_eigenvectors[:, _band+i, _idx_x, _idx_y], np.conj(_eigenvectors[:, _band+i, _idx_x, _idx_y]))
-        tot_proj_dkx += np.outer(_eigenvectors_dkx[:, _band+i, _idx_x, _idx_y], np.conj(_eigenvectors_dkx[:, _band+i, _idx_x, _idx_y]))
-        tot_proj_dky += np.outer(_eigenvectors_dky[:, _band+i, _idx_x, _idx_y], np.conj(_eigenvectors_dky[:, _band+i, _idx_x, _idx_y]))
+    def projector(eigenvectors):
+        vecs = eigenvectors[:, _band:_band + _group_size, _idx_x, _idx_y]
+        return np.einsum('ag...,bg...->...ab', vecs, np.conj(vecs))
+
+    tot_proj = projector(_eigenvectors)
+    tot_proj_dkx = projector(_eigenvectors_dkx)
+    tot_proj_dky = projector(_eigenvectors_dky)
 
     dkx = np.linalg.norm(_bvec[0]) / (1000 * (numb_samp_x - 1))
     dky = np.linalg.norm(_bvec[1]) / (1000 * (numb_samp_y - 1))
 
     grad_kx = np.subtract(tot_proj_dkx, tot_proj) / dkx
     grad_ky = np.subtract(tot_proj_dky, tot_proj) / dky
+    grad = np.stack((grad_kx, grad_ky), axis=-3)
 
-    tensor = np.zeros((2, 2), dtype=np.complex128)
-    tensor[0][0] = np.trace(np.matmul(tot_proj, np.matmul(grad_kx, grad_kx)))
-    tensor[0][1] = np.trace(np.matmul(tot_proj, np.matmul(grad_kx, grad_ky)))
-    tensor[1][0] = np.trace(np.matmul(tot_proj, np.matmul(grad_ky, grad_kx)))
-    tensor[1][1] = np.trace(np.matmul(tot_proj, np.matmul(grad_ky, grad_ky)))
+    # tensor[..., mu, nu] = tr(P d_mu P d_nu P)
+    tensor = np.trace(np.matmul(tot_proj[..., None, None, :, :],
+                                np.matmul(grad[..., :, None, :, :], grad[..., None, :, :, :])), axis1=-2, axis2=-1)
 
     return tensor
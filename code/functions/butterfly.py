@@ -1,5 +1,7 @@
 """Functions for butterfly calculations."""
 
+import numpy as np
+import itertools
 from fractions import Fraction
 
 
@@ -61,3 +63,111 @@ def chern(pval, qval):
         Chern_list.insert(q//2-1, Chern_list[q//2-1])
 
     return Chern_list, tr_list
+
+
+def eigenvalues(ham_val, q_val):
+    r"""Compute the sorted eigenvalues of a Hofstadter Hamiltonian, exploiting its structure where possible.
+
+    Real symmetric Hamiltonians are passed to the real eigensolver. If the Hamiltonian is bipartite with two sublattices, i.e. it has the chiral form
+
+    .. math::
+        H = \begin{pmatrix} 0 & h \\ h^\dagger & 0 \end{pmatrix},
+
+    then its eigenvalues are given by :math:`\pm\sigma_i`, where :math:`\sigma_i` are the singular values of the :math:`q\times q` block :math:`h`. This is the case for the nearest-neighbor honeycomb lattice.
+
+    Parameters
+    ----------
+    ham_val: ndarray
+        The Hermitian Hamiltonian matrix, or a stack of Hamiltonian matrices with dimension (..., M, M).
+    q_val: int
+        The denominator of the flux density.
+
+    Returns
+    -------
+    lmbda: ndarray
+        The eigenvalues in ascending order, with dimension (..., M).
+    """
+
+    if not np.any(np.imag(ham_val)):  # real symmetric Hamiltonians use the faster real solvers
+        ham_val = np.real(ham_val)
+
+    if np.shape(ham_val)[-1] == 2 * q_val and not np.any(ham_val[..., :q_val, :q_val]) and not np.any(ham_val[..., q_val:, q_val:]):
+        sigma = np.linalg.svd(ham_val[..., :q_val, q_val:], compute_uv=False)  # in descending order
+        lmbda = np.concatenate((-sigma, sigma[..., ::-1]), axis=-1)
+    else:
+        lmbda = np.linalg.eigvalsh(ham_val)
+
+    return lmbda
+
+
+def mirror_symmetric(model_func, q_val):
+    r"""Determine whether the butterfly spectrum is mirror symmetric about :math:`n_\phi=1/2`.
+
+    The spectrum at flux density :math:`(q-p)/q` is the mirror image of the spectrum at :math:`p/q` if the Hamiltonian at :math:`\mathbf{k}=\mathbf{0}` is mapped to its complex conjugate. This is a property of the lattice and hoppings, rather than the flux density, and so it is decided once from the pair :math:`(1, q-1)`.
+
+    Parameters
+    ----------
+    model_func: function
+        The function that constructs the model for a given numerator of the flux density.
+    q_val: int
+        The denominator of the flux density.
+
+    Returns
+    -------
+    mirror: bool
+        The flag for whether the spectrum is mirror symmetric.
+    """
+
+    if q_val <= 2:
+        return False
+
+    ham = model_func(1).hamiltonian(np.array([0, 0]))
+    ham_mirror = model_func(q_val - 1).hamiltonian(np.array([0, 0]))
+
+    return bool(np.allclose(ham, np.conj(ham_mirror)))
+
+
+def spectra(model_func, ps_val, q_val, chunk_size=8, map_func=map):
+    r"""Compute the spectra at :math:`\mathbf{k}=\mathbf{0}` for a sequence of flux densities.
+
+    The Hamiltonians are diagonalized in stacked chunks. If the spectrum is mirror symmetric, then the spectra for :math:`p>q/2` are reused from :math:`q-p`, without constructing their Hamiltonians.
+
+    Parameters
+    ----------
+    model_func: function
+        The function that constructs the model for a given numerator of the flux density.
+    ps_val: list
+        The ascending list of numerators of the flux density.
+    q_val: int
+        The denominator of the flux density.
+    chunk_size: int
+        The number of Hamiltonians to diagonalize in a single stacked call (default=8).
+    map_func: function
+        The function used to map over the chunks, e.g. the map of an executor (default=map).
+
+    Yields
+    ------
+    model: Hofstadter
+        The model at flux density p/q.
+    lmbda: ndarray
+        The eigenvalues in ascending order.
+    """
+
+    mirror = mirror_symmetric(model_func, q_val)
+
+    def diagonalize(p_chunk):
+        models_val = [model_func(p_val) for p_val in p_chunk]
+        mirrored = [mirror and 2*p_val > q_val for p_val in p_chunk]
+        solve = [model_val.hamiltonian(np.array([0, 0])) for model_val, mirror_val in zip(models_val, mirrored) if not mirror_val]
+        lmbdas_val = iter(eigenvalues(np.stack(solve), q_val) if solve else [])
+
+        return [(model_val, None if mirror_val else next(lmbdas_val)) for model_val, mirror_val in zip(models_val, mirrored)]
+
+    p_chunks = [ps_val[i:i+chunk_size] for i in range(0, len(ps_val), chunk_size)]
+    spectra_lower = {}  # spectra for p < q/2, to be mirrored to q-p
+    for p_val, (model, lmbda) in zip(ps_val, itertools.chain.from_iterable(map_func(diagonalize, p_chunks))):
+        if lmbda is None:
+            lmbda = spectra_lower.pop(q_val - p_val)
+        elif mirror and 2*p_val < q_val:
+            spectra_lower[p_val] = lmbda
+        yield model, lmbda
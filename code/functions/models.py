@@ -1,9 +1,73 @@
 """Functions for the model classes."""
 
 import numpy as np
-import matplotlib.pyplot as plt
-from mpl_toolkits.mplot3d import axes3d
-from copy import deepcopy
+from functools import lru_cache
+
+
+def _add_diag(matrix, diag_array, offset=0):
+    """Adds a (rolled over) diagonal to matrices that are batched over the momentum dimensions, in place.
+
+    Parameters
+    ----------
+    matrix: ndarray
+        The matrices with dimension (..., n, n).
+    diag_array: array_like
+        The diagonal entries with dimension (n, ...). Real diagonal entries are only added to the real part of the matrices.
+    offset: int
+        The offset of the diagonal, which is above the main diagonal for offset>0 and below it for offset<0 (default=0).
+    """
+
+    rows = np.arange(np.shape(matrix)[-1])
+    shifted = (rows + abs(offset)) % len(rows)  # indices of the (rolled over) diagonal at |offset|
+    diag_array = np.moveaxis(np.asarray(diag_array), 0, -1)
+    if np.isrealobj(diag_array):  # avoid casting real entries to complex
+        matrix = matrix.real
+    if offset >= 0:
+        matrix[..., rows, shifted] += diag_array
+    else:
+        matrix[..., shifted, rows] += diag_array
+
+
+def _polar(amplitude, phase):
+    """Evaluates amplitude * exp(i * phase) from the cosine and sine of the phase, which avoids the complex exponential.
+
+    Parameters
+    ----------
+    amplitude: float or ndarray
+        The real amplitude.
+    phase: float or ndarray
+        The real phase.
+
+    Returns
+    -------
+    value: ndarray
+        The complex values, with the broadcast dimensions of amplitude and phase.
+    """
+
+    value = np.empty(np.broadcast_shapes(np.shape(amplitude), np.shape(phase)), dtype=np.complex128)
+    value.real = amplitude * np.cos(phase)
+    value.imag = amplitude * np.sin(phase)
+
+    return value
+
+
+def _y_positions(q, k):
+    """The y-positions of the magnetic unit cell, broadcast against the leading dimensions of the momenta.
+
+    Parameters
+    ----------
+    q: int
+        The denominator of the flux density.
+    k: ndarray
+        The momentum vector, or an array of momentum vectors with dimension (..., 2).
+
+    Returns
+    -------
+    m: ndarray
+        The y-positions in [0, q), with dimension (q, 1, ...) so that they broadcast against the leading dimensions of k.
+    """
+
+    return np.arange(q).reshape((q,) + (1,) * (np.ndim(k) - 1))
 
 
 def reciprocal_vectors(avec):
@@ -66,11 +130,27 @@ def nearest_neighbor_finder(avec, abasisvec, t_list, x_init, y_init, basis_init)
     Returns
     -------
     data: ndarray
-        The array of relevant nearest neighbors.
+        The structured array of relevant nearest neighbors, with fields r, phi, x_init, y_init, Y_init, dx, dy, dY, dI, dJ, sub_init, sub_final, and NN_group.
     bases: list
         The list of unique sublattice indices.
     """
 
+    # results are cached on the (hashable) lattice geometry, since they are requested for every Hamiltonian
+    return _nearest_neighbor_finder(tuple(map(tuple, np.asarray(avec, dtype=np.float64))),
+                                    tuple(map(tuple, np.asarray(abasisvec, dtype=np.float64))),
+                                    tuple(t_list), x_init, y_init, basis_init)
+
+
+@lru_cache(maxsize=None)
+def _nearest_neighbor_finder(avec, abasisvec, t_list, x_init, y_init, basis_init):
+    """Cached implementation of :func:`nearest_neighbor_finder`, with the lattice and basis vectors passed as tuples.
+
+    The returned arrays are shared between calls and are therefore marked as read-only.
+    """
+
+    avec = np.array(avec)
+    abasisvec = np.array(abasisvec)
+
     # --- Create list of NN to consider from t_list
     numb_list = []
     for i, t in enumerate(t_list):
@@ -78,58 +158,52 @@ def nearest_neighbor_finder(avec, abasisvec, t_list, x_init, y_init, basis_init)
             numb_list.append(i+1)
 
     # --- Create grid of basis vectors from [-numb_t_max, numb_t_max]
-    abasisvec = [abasisvec[i] - abasisvec[basis_init] for i in range(len(abasisvec))]  # shift basis
-    vectors = []
-    vectors_unit = []
-    for i in range(-numb_list[-1], numb_list[-1]+1):
-        for j in range(-numb_list[-1], numb_list[-1]+1):
-            r_unit = np.array([i, j])
-            vectors_unit.append(r_unit)
-            r = np.matmul(r_unit, avec)
-            for idx, k in enumerate(abasisvec):
-                vectors.append([r+k, i, j, basis_init, idx])  # add basis index
+    abasisvec = abasisvec - abasisvec[basis_init]  # shift basis
+    numb_basis = len(abasisvec)
+    unit_range = np.arange(-numb_list[-1], numb_list[-1]+1)
+    vectors_unit = np.stack(np.meshgrid(unit_range, unit_range, indexing='ij'), axis=-1).reshape(-1, 2)
+    vectors = (np.matmul(vectors_unit, avec)[:, None, :] + abasisvec[None, :, :]).reshape(-1, 2)  # add basis vectors
 
     # --- Define data array with info on each vector
-    data = np.zeros((len(vectors), 13), dtype=object)
-    for i, val in enumerate(vectors):
-        data[i, 0] = round(np.linalg.norm(val[0]), 10)  # r (round so that we can use it for comparison)
-        data[i, 1] = np.angle(val[0][0]+1j*val[0][1])  # phi
-        data[i, 2] = x_init  # x_init
-        data[i, 3] = y_init  # y_init
-        data[i, 4] = y_init / avec[1][1]  # y_init / a2_y
-        data[i, 5] = val[0][0]  # dx
-        data[i, 6] = val[0][1]  # dy
-        data[i, 7] = val[0][1] / avec[1][1]  # dy / a2_y
-        data[i, 8] = val[1]  # dI
-        data[i, 9] = val[2]  # dJ
-        data[i, 10] = val[3]  # sub_init
-        data[i, 11] = val[4]  # sub_final
+    data = np.zeros(len(vectors), dtype=[('r', np.float64),  # r (round so that we can use it for comparison)
+                                         ('phi', np.float64),  # phi
+                                         ('x_init', np.float64),  # x_init
+                                         ('y_init', np.float64),  # y_init
+                                         ('Y_init', np.float64),  # y_init / a2_y
+                                         ('dx', np.float64),  # dx
+                                         ('dy', np.float64),  # dy
+                                         ('dY', np.float64),  # dy / a2_y
+                                         ('dI', np.int64),  # dI
+                                         ('dJ', np.int64),  # dJ
+                                         ('sub_init', np.int64),  # sub_init
+                                         ('sub_final', np.int64),  # sub_final
+                                         ('NN_group', np.int64)])  # NN group
+    data['r'] = np.round(np.linalg.norm(vectors, axis=1), 10)
+    data['phi'] = np.arctan2(vectors[:, 1], vectors[:, 0])
+    data['x_init'] = x_init
+    data['y_init'] = y_init
+    data['Y_init'] = y_init / avec[1][1]
+    data['dx'] = vectors[:, 0]
+    data['dy'] = vectors[:, 1]
+    data['dY'] = vectors[:, 1] / avec[1][1]
+    data['dI'] = np.repeat(vectors_unit[:, 0], numb_basis)
+    data['dJ'] = np.repeat(vectors_unit[:, 1], numb_basis)
+    data['sub_init'] = basis_init
+    data['sub_final'] = np.tile(np.arange(numb_basis), len(vectors_unit))
 
     # --- Extract the NN groups (filter data based on radius)
-    data = data[data[:, 0].argsort()]  # sort by increasing r
-    # delete the first r=0 row
-    mask = (data[:, 0] != 0)
-    data = data[mask, :]
-    radii = np.sort(list(set(data[:, 0])))
-    # label the NN group
-    for i, row in enumerate(data):
-        for j, r in enumerate(radii):
-            if row[0] == r:
-                data[i, 12] = j+1  # NN group
-    select_radii = [radii[i - 1] for i in numb_list]
-    # delete rows with other radii
-    rows_to_delete = []
-    for i, row in enumerate(data):
-        if row[0] not in select_radii:
-            rows_to_delete.append(i)
-    data = np.delete(data, rows_to_delete, axis=0)
+    data = data[np.argsort(data['r'], kind='stable')]  # sort by increasing r
+    # label the NN group (the origin r=0 is always present and labelled as group 0)
+    _, radii_idx = np.unique(data['r'], return_inverse=True)
+    data['NN_group'] = radii_idx
+    # select rows with the relevant radii (this also removes the origin)
+    data = data[np.isin(data['NN_group'], numb_list)]
 
     # --- Extract bases set
-    bases = []
-    for i, val in enumerate(data):
-        bases.append(val[10])
-        bases.append(val[11])
-    bases = np.sort(list(set(bases)))
+    bases = np.unique(np.concatenate((data['sub_init'], data['sub_final'])))
+
+    data.setflags(write=False)
+    bases.setflags(write=False)
 
     return data, bases
 
@@ -149,26 +223,68 @@ def nearest_neighbor_sorter(data_array):
     """
 
     # count the number of dJ
-    dJ_list = []
-    for i, val in enumerate(data_array):
-        dJ_list.append(val[9])
-    dJ_list = np.sort(list(set(dJ_list)))
+    dJ_list = np.unique(data_array['dJ'])
     numb_dJ = len(dJ_list)
 
     # group paths by dJ
     grouped_paths = np.zeros(numb_dJ, dtype=object)
-    for i in range(numb_dJ):
-        grouped_paths[i] = []
-
     for i, dJval in enumerate(dJ_list):
-        for j, val in enumerate(data_array):
-            if val[9] == dJval:
-                grouped_paths[i].append(val)
-        grouped_paths[i].append(dJval)
+        grouped_paths[i] = list(data_array[data_array['dJ'] == dJval]) + [dJval]
 
     return grouped_paths
 
 
+def nearest_neighbor_groups(avec, abasisvec, t_list):
+    """Groups the relevant nearest neighbors by initial sublattice, final sublattice, and dJ.
+
+    Parameters
+    ----------
+    avec: ndarray
+        The lattice vectors.
+    abasisvec: ndarray
+        The basis vectors.
+    t_list: list
+        The list of hopping amplitudes in order of ascending NN.
+
+    Returns
+    -------
+    vec_group_matrix: ndarray
+        The matrix of nearest neighbor arrays grouped by dJ (see :func:`nearest_neighbor_sorter`), indexed by the initial and final sublattices.
+    """
+
+    # the grouping only depends on the lattice geometry, so it is cached and shared between flux densities
+    return _nearest_neighbor_groups(tuple(map(tuple, np.asarray(avec, dtype=np.float64))),
+                                    tuple(map(tuple, np.asarray(abasisvec, dtype=np.float64))),
+                                    tuple(t_list))
+
+
+@lru_cache(maxsize=None)
+def _nearest_neighbor_groups(avec, abasisvec, t_list):
+    """Cached implementation of :func:`nearest_neighbor_groups`, with the lattice and basis vectors passed as tuples."""
+
+    data0, bases = nearest_neighbor_finder(avec, abasisvec, t_list, 0, 0, 0)
+    data = [data0]
+
+    len_bases = len(bases)
+    if len_bases > 1:
+        for i, val in enumerate(bases[1:]):
+            data_set, _ = nearest_neighbor_finder(avec, abasisvec, t_list, abasisvec[i+1][0], abasisvec[i+1][1], val)
+            data.append(data_set)
+    data = np.concatenate(data)
+
+    vec_group_matrix = np.zeros((len_bases, len_bases), dtype=object)
+    for i in range(len_bases):  # initial sublattice
+        mask_i = (data['sub_init'] == i)
+        data_mask_i = data[mask_i]
+        for j in range(len_bases):  # final sublattice
+            mask_j = (data_mask_i['sub_final'] == j)
+            data_mask_ij = data_mask_i[mask_j]
+            vec_group_list = nearest_neighbor_sorter(data_mask_ij)
+            vec_group_matrix[i, j] = vec_group_list
+
+    return vec_group_matrix
+
+
 def peierls_factor(nphi, dx, y_cart, dy_cart, A_UC):
     r"""The Peierls factor.
 
@@ -183,28 +299,70 @@ def peierls_factor(nphi, dx, y_cart, dy_cart, A_UC):
     ----------
     nphi: float
         The flux density.
-    dx: float
+    dx: float or ndarray
         The change in x-coordinates.
-    y_cart: int
+    y_cart: int or ndarray
         The initial y-coordinate in units of a2[1].
-    dy_cart: int
+    dy_cart: int or ndarray
         The change in y-coordinates in units of a2[1].
     A_UC: float
         The unit cell area in units of a2 (possibly scaled by a periodicity factor).
 
     Returns
     -------
-    factor: complex
-        The Peierls factor.
+    factor: complex or ndarray
+        The Peierls factor, with the broadcast dimensions of dx, y_cart, and dy_cart.
     """
 
-    phase = - 2 * np.pi * nphi * dx * (y_cart + dy_cart/2) / A_UC
-    factor = np.exp(1j * phase)
+    prefactor = - 2 * np.pi * nphi / A_UC  # hoisted out of the element-wise product
+    phase = prefactor * dx * (y_cart + dy_cart/2)
+    factor = _polar(1, phase)
 
     return factor
 
 
-def diag_func(t_val, p_val, q_val, A_UC_val, vec_group, k_val, dJ_val, J_idx_val):
+def diag_table(t_val, p_val, q_val, A_UC_val, vec_group, dJ_val):
+    r"""The momentum-independent table of the diagonal function.
+
+    The diagonal function :math:`\Lambda_{l, n}` (see :func:`diag_func`) factorizes into the momentum phase factors of each hopping vector, multiplied by a table of hopping amplitudes and Peierls factors, which only depends on the flux density. This table can therefore be computed once and reused for every momentum.
+
+    Parameters
+    ----------
+    t_val: list
+        The list of hopping amplitudes in order of ascending NN.
+    p_val: int
+        The numerator of the flux density.
+    q_val: int
+        The denominator of the flux density.
+    A_UC_val: float
+        The unit cell area in units of a2 (possibly scaled by a periodicity factor).
+    vec_group: ndarray
+        The array of relevant nearest neighbors grouped by dJ.
+    dJ_val: int
+        The y-displacement in terms of unit cells.
+
+    Returns
+    -------
+    coeffs: ndarray
+        The hopping amplitudes multiplied by the Peierls factors, with dimension (num_vectors, q).
+    dxy: ndarray
+        The displacement vectors, with dimension (2, num_vectors).
+    """
+
+    nphi = p_val/q_val
+    J_idx = np.arange(q_val)
+    paths = [row for val in vec_group if val[-1] == dJ_val for row in val[:-1]]  # extract rows with appropriate dJ
+    if not paths:
+        return np.zeros((0, q_val), dtype=np.complex128), np.zeros((2, 0))
+    paths = np.array(paths)  # structured array of the vectors in the path group
+    peierls = peierls_factor(nphi, paths['dx'][:, None], J_idx + paths['Y_init'][:, None], paths['dY'][:, None], A_UC_val)
+    coeffs = - np.asarray(t_val)[paths['NN_group'] - 1][:, None] * peierls
+    dxy = np.stack((paths['dx'], paths['dy']))
+
+    return coeffs, dxy
+
+
+def diag_func(t_val, p_val, q_val, A_UC_val, vec_group, k_val, dJ_val, table=None):
     r"""The diagonal function.
 
     The function that populates the diagonals of the Harper matrix is given by
@@ -227,31 +385,75 @@ def diag_func(t_val, p_val, q_val, A_UC_val, vec_group, k_val, dJ_val, J_idx_val
     vec_group: ndarray
         The array of relevant nearest neighbors grouped by dJ.
     k_val: ndarray
-        The momentum vector.
+        The momentum vector, or an array of momentum vectors with dimension (..., 2).
     dJ_val: int
         The y-displacement in terms of unit cells.
-    J_idx_val: int
-        The y-position in terms of unit cells.
+    table: tuple
+        The precomputed output of :func:`diag_table`, to reuse across momenta (default=None).
 
     Returns
     -------
-    term: complex
-        The diagonal term.
+    term: ndarray
+        The diagonal terms for each y-position J in [0, q), with dimension (..., q) where the leading dimensions are those of k_val.
     """
 
-    nphi = p_val/q_val
-    term = 0
-    for idx, val in enumerate(vec_group):
-        if val[-1] == dJ_val:  # extract rows with appropriate dJ
-            for k, val2 in enumerate(val[:-1]):  # for each vector in path group
-                NN_group = int(val2[12])
-                term += - t_val[NN_group - 1] * (peierls_factor(nphi, val2[5], J_idx_val + val2[4], val2[7], A_UC_val)
-                                                 * np.exp(1j * np.vdot(np.array([val2[5], val2[6]]), k_val)))
+    if table is None:
+        table = diag_table(t_val, p_val, q_val, A_UC_val, vec_group, dJ_val)
+    coeffs, dxy = table
+    term = np.matmul(_polar(1, np.matmul(k_val, dxy)), coeffs)
 
     return term
 
 
-def Hamiltonian(t, p, q, A_UC, vec_group_matrix, k):
+def hamiltonian_tables(t, p, q, A_UC, vec_group_matrix):
+    """The momentum-independent tables of the generalized Hofstadter Hamiltonian.
+
+    Parameters
+    ----------
+    t: list
+        The list of hopping amplitudes in order of ascending NN.
+    p: int
+        The numerator of the flux density.
+    q: int
+        The denominator of the flux density.
+    A_UC: float
+        The unit cell area in units of a2 (possibly scaled by a periodicity factor).
+    vec_group_matrix: ndarray
+        The matrix of grouped nearest neighbor arrays.
+
+    Returns
+    -------
+    tables: ndarray
+        The matrix of lists of (dJ, HC, coeffs, dxy) tuples for each sublattice block, where HC flags whether the Hermitian conjugate diagonal is also populated, and coeffs and dxy are given by :func:`diag_table`.
+    """
+
+    I = np.shape(vec_group_matrix)[0]
+    J = np.shape(vec_group_matrix)[1]
+
+    tables = np.zeros((I, J), dtype=object)
+    for i in range(I):
+        for j in range(J):
+            dJ_list = []
+            for term in vec_group_matrix[i, j]:
+                dJ_list.append(term[-1])
+
+            HC_flag = False
+            for k1, val in enumerate(dJ_list):  # remove negative unit cell hoppings (for H.c. cases)
+                for k2, val2 in enumerate(dJ_list):
+                    if val == -val2 and val != 0:
+                        HC_flag = True
+                        if val2 < 0:
+                            del dJ_list[k2]
+                        else:
+                            del dJ_list[k1]
+
+            tables[i, j] = [(dJ, HC_flag and dJ > 0) + diag_table(t, p, q, A_UC, vec_group_matrix[i, j], dJ)
+                            for dJ in dJ_list]
+
+    return tables
+
+
+def Hamiltonian(t, p, q, A_UC, vec_group_matrix, k, tables=None, dtype=np.complex128):
     r"""The generalized Hofstadter Hamiltonian.
 
     The generalized Hofstadter Hamiltonian is given by the :math:`N_b\times N_b` block matrix
@@ -292,53 +494,53 @@ def Hamiltonian(t, p, q, A_UC, vec_group_matrix, k):
     vec_group_matrix: ndarray
         The matrix of grouped nearest neighbor arrays.
     k: ndarray
-        The momentum vector.
+        The momentum vector, or an array of momentum vectors with dimension (..., 2).
+    tables: ndarray
+        The precomputed output of :func:`hamiltonian_tables`, to reuse across momenta (default=None).
+    dtype: type
+        The complex data type of the Hamiltonian matrix (default=np.complex128).
 
     Returns
     -------
     Hamiltonian: ndarray
-        The Hofstadter Hamiltonian matrix of dimension :math:`N_b q \times N_b q`.
+        The Hofstadter Hamiltonian matrix of dimension :math:`N_b q \times N_b q`, preceded by the leading dimensions of k.
     """
 
+    if tables is None:
+        tables = hamiltonian_tables(t, p, q, A_UC, vec_group_matrix)
+
     I = np.shape(vec_group_matrix)[0]
     J = np.shape(vec_group_matrix)[1]
 
-    Ham_matrix = []
-    for i in range(I):
-        Ham_row = []
-        for j in range(J):
-            Hamiltonian = np.zeros((q, q), dtype=np.complex128)
-
-            dJ_list = []
-            for term in vec_group_matrix[i, j]:
-                dJ_list.append(term[-1])
+    # the sublattice blocks are written into views of a single preallocated matrix
+    Hamiltonian = np.zeros(np.shape(k)[:-1] + (I * q, J * q), dtype=dtype)
+    rows = np.arange(q)
 
-            HC_flag = False
-            for k1, val in enumerate(dJ_list):  # remove negative unit cell hoppings (for H.c. cases)
-                for k2, val2 in enumerate(dJ_list):
-                    if val == -val2 and val != 0:
-                        HC_flag = True
-                        if val2 < 0:
-                            del dJ_list[k2]
-                        else:
-                            del dJ_list[k1]
+    # the upper blocks are mirrored from the lower ones, so the matrix is exactly Hermitian and matches what eigh reads
+    for i in range(I):
+        for j in range(i + 1):
+            block = Hamiltonian[..., i*q:(i+1)*q, j*q:(j+1)*q]
 
-            for dJ in dJ_list:
+            for dJ, HC, coeffs, dxy in tables[i, j]:
+                shifted = (rows + abs(dJ)) % q  # indices of the (rolled over) diagonal at offset |dJ|
                 # upper_diag_array
-                diag_array = np.array([diag_func(t, p, q, A_UC, vec_group_matrix[i, j], k, dJ, J_idx) for J_idx in range(q)])
-                Hamiltonian += np.roll(np.diag(diag_array), abs(dJ), axis=int((np.sign(dJ)+1)/2))
+                diag_array = diag_func(t, p, q, A_UC, vec_group_matrix[i, j], k, dJ, table=(coeffs, dxy))
+                if dJ > 0:
+                    block[..., rows, shifted] += diag_array
+                else:
+                    block[..., shifted, rows] += diag_array
                 # lower_diag_array
-                if HC_flag and dJ > 0:
-                    Hamiltonian += np.roll(np.diag(np.conj(diag_array)), abs(dJ), axis=0)
+                if HC:
+                    block[..., shifted, rows] += np.conj(diag_array)
 
-            Ham_row.append(Hamiltonian)
-        Ham_matrix.append(Ham_row)
-    Hamiltonian = np.block(Ham_matrix)
+            # the upper blocks follow from Hermiticity
+            if j < i:
+                Hamiltonian[..., j*q:(j+1)*q, i*q:(i+1)*q] = np.conj(np.swapaxes(block, -1, -2))
 
     return Hamiltonian
 
 
-def BasicSquareHamiltonian(t, p, q, k, period):
+def BasicSquareHamiltonian(t, p, q, k, period, dtype=np.complex128):
     r"""The basic square lattice Hofstadter Hamiltonian.
 
     The Hofstadter Hamiltonian for the square lattice with nearest-neighbor hopping.
@@ -356,39 +558,44 @@ def BasicSquareHamiltonian(t, p, q, k, period):
     q: int
         The denominator of the flux density.
     k: ndarray
-        The momentum vector.
+        The momentum vector, or an array of momentum vectors with dimension (..., 2).
     period: int
         The factor by which to divide A_UC in the flux density.
+    dtype: type
+        The complex data type of the Hamiltonian matrix (default=np.complex128).
 
     Returns
     -------
     Hamiltonian: ndarray
-        The Hofstadter Hamiltonian matrix of dimension :math:`q \times q`.
+        The Hofstadter Hamiltonian matrix of dimension :math:`q \times q`, preceded by the leading dimensions of k.
     """
 
-    Hamiltonian = np.zeros((q, q), dtype=np.complex128)
+    Hamiltonian = np.zeros(np.shape(k)[:-1] + (q, q), dtype=dtype)
     nphi = p / q
+    flux = 2*np.pi*period*nphi
+    m = _y_positions(q, k)
 
-    def A(t_val, nphi_val, m_val, k_val):
-        value = -t_val*np.exp(-1j*2*np.pi*period*nphi_val*m_val + 1j*k_val[0])
+    def A(t_val, flux_val, m_val, k_val):
+        # the hopping and its Hermitian conjugate combine into a real cosine on the diagonal
+        value = -2*t_val*np.cos(k_val[..., 0] - flux_val*m_val)
         return value
 
     def B_plus(t_val, k_val):
-        value = -t_val*np.exp(1j*k_val[1])
+        value = _polar(-t_val, k_val[..., 1])
         return value
 
-    diag_array = np.array([A(t[0], nphi, m, k) for m in range(q)])
-    Hamiltonian += np.roll(np.diag(diag_array), 0, axis=1)
+    upper_diag_array = np.broadcast_to(B_plus(t[0], k), (q,) + np.shape(k)[:-1])
+    _add_diag(Hamiltonian, upper_diag_array, 1)
 
-    upper_diag_array = np.array([B_plus(t[0], k) for _ in range(q)])
-    Hamiltonian += np.roll(np.diag(upper_diag_array), 1, axis=1)
+    Hamiltonian = Hamiltonian + np.conj(np.swapaxes(Hamiltonian, -1, -2))
 
-    Hamiltonian = Hamiltonian + np.conj(Hamiltonian).T
+    diag_array = A(t[0], flux, m, k)
+    _add_diag(Hamiltonian, diag_array)
 
     return Hamiltonian
 
 
-def BasicTriangularHamiltonian(t, p, q, k, period):
+def BasicTriangularHamiltonian(t, p, q, k, period, dtype=np.complex128):
     r"""The basic triangular lattice Hofstadter Hamiltonian.
 
     The Hofstadter Hamiltonian for the triangular lattice with nearest-neighbor hopping.
@@ -406,40 +613,45 @@ def BasicTriangularHamiltonian(t, p, q, k, period):
     q: int
         The denominator of the flux density.
     k: ndarray
-        The momentum vector.
+        The momentum vector, or an array of momentum vectors with dimension (..., 2).
     period: int
         The factor by which to divide A_UC in the flux density.
+    dtype: type
+        The complex data type of the Hamiltonian matrix (default=np.complex128).
 
     Returns
     -------
     Hamiltonian: ndarray
-        The Hofstadter Hamiltonian matrix of dimension :math:`q \times q`.
+        The Hofstadter Hamiltonian matrix of dimension :math:`q \times q`, preceded by the leading dimensions of k.
     """
 
-    Hamiltonian = np.zeros((q, q), dtype=np.complex128)
+    Hamiltonian = np.zeros(np.shape(k)[:-1] + (q, q), dtype=dtype)
     nphi = p / q
+    flux = 2*np.pi*period*nphi
+    m = _y_positions(q, k)
 
-    def A(t_val, nphi_val, m_val, k_val):
-        value = -t_val*np.exp(-1j*2*np.pi*period*nphi_val*m_val + 1j*k_val[0])
+    def A(t_val, flux_val, m_val, k_val):
+        # the hopping and its Hermitian conjugate combine into a real cosine on the diagonal
+        value = -2*t_val*np.cos(k_val[..., 0] - flux_val*m_val)
         return value
 
-    def B_plus(t_val, nphi_val, m_val, k_val):
-        value = (-t_val*np.exp(-1j*np.pi*period*nphi_val*(m_val + 1/2) + 1j*(0.5*k_val[0] + np.sqrt(3)*k_val[1]/2))
-                 -t_val*np.exp(+1j*np.pi*period*nphi_val*(m_val + 1/2) + 1j*(-0.5*k_val[0] + np.sqrt(3)*k_val[1]/2)))
+    def B_plus(t_val, flux_val, m_val, k_val):
+        # the two hoppings share the phase of the y-displacement, so they combine into a real cosine amplitude
+        value = _polar(-2*t_val*np.cos(flux_val/2*(m_val + 1/2) - 0.5*k_val[..., 0]), np.sqrt(3)/2*k_val[..., 1])
         return value
 
-    diag_array = np.array([A(t[0], nphi, m, k) for m in range(q)])
-    Hamiltonian += np.roll(np.diag(diag_array), 0, axis=1)
+    upper_diag_array = B_plus(t[0], flux, m, k)
+    _add_diag(Hamiltonian, upper_diag_array, 1)
 
-    upper_diag_array = np.array([B_plus(t[0], nphi, m, k) for m in range(q)])
-    Hamiltonian += np.roll(np.diag(upper_diag_array), 1, axis=1)
+    Hamiltonian = Hamiltonian + np.conj(np.swapaxes(Hamiltonian, -1, -2))
 
-    Hamiltonian = Hamiltonian + np.conj(Hamiltonian).T
+    diag_array = A(t[0], flux, m, k)
+    _add_diag(Hamiltonian, diag_array)
 
     return Hamiltonian
 
 
-def BasicHoneycombHamiltonian(t, p, q, k, period):
+def BasicHoneycombHamiltonian(t, p, q, k, period, dtype=np.complex128):
     r"""The basic honeycomb lattice Hofstadter Hamiltonian.
 
     The Hofstadter Hamiltonian for the honeycomb lattice with nearest-neighbor hopping.
@@ -457,71 +669,50 @@ def BasicHoneycombHamiltonian(t, p, q, k, period):
     q: int
         The denominator of the flux density.
     k: ndarray
-        The momentum vector.
+        The momentum vector, or an array of momentum vectors with dimension (..., 2).
     period: int
         The factor by which to divide A_UC in the flux density.
+    dtype: type
+        The complex data type of the Hamiltonian matrix (default=np.complex128).
 
     Returns
     -------
     Hamiltonian: ndarray
-        The Hofstadter Hamiltonian matrix of dimension :math:`2q \times 2q`.
+        The Hofstadter Hamiltonian matrix of dimension :math:`2q \times 2q`, preceded by the leading dimensions of k.
     """
 
-    def AB_block_func(t_val, p_val, q_val, k_val):
-        ham = np.zeros((q_val, q_val), dtype=np.complex128)
-        nphi = p_val / q_val
-
-        def A(t_val, nphi_val, m_val, k_val):
-            value = (-t_val * np.exp(-1j*np.pi*period*nphi_val*(m_val + 1/6) + 1j*(+k_val[0]/2 + np.sqrt(3)*k_val[1]/6))
-                     -t_val * np.exp(+1j*np.pi*period*nphi_val*(m_val + 1/6) + 1j*(-k_val[0]/2 + np.sqrt(3)*k_val[1]/6)))
-            return value
-
-        def B_minus(t_val, k_val):
-            value = -t_val * np.exp(-1j*2*np.sqrt(3)*k_val[1]/6)
-            return value
-
-        upper_diag_array = np.array([A(t_val, nphi, m, k_val) for m in range(q_val)])
-        ham += np.roll(np.diag(upper_diag_array), 0, axis=1)
-
-        upper_diag_array2 = np.array([B_minus(t_val, k_val) for _ in range(q_val)])
-        ham += np.roll(np.diag(upper_diag_array2), 1, axis=0)
-
-        return ham
-
-    def BA_block_func(t_val, p_val, q_val, k_val):
-        ham = np.zeros((q_val, q_val), dtype=np.complex128)
+    def BA_block_func(t_val, p_val, q_val, k_val, ham):
         nphi = p_val / q_val
+        flux = np.pi*period*nphi
+        m = _y_positions(q_val, k_val)
 
-        def A(t_val, nphi_val, m_val, k_val):
-            value = (-t_val * np.exp(-1j*np.pi*period*nphi_val*(m_val + 1/6) + 1j*(+k_val[0]/2 - np.sqrt(3)*k_val[1]/6))
-                     -t_val * np.exp(+1j*np.pi*period*nphi_val*(m_val + 1/6) + 1j*(-k_val[0]/2 - np.sqrt(3)*k_val[1]/6)))
+        def A(t_val, flux_val, m_val, k_val):
+            # the two hoppings share the phase of the y-displacement, so they combine into a real cosine amplitude
+            value = _polar(-2*t_val*np.cos(flux_val*(m_val + 1/6) - 0.5*k_val[..., 0]), -np.sqrt(3)/6*k_val[..., 1])
             return value
 
         def B_plus(t_val, k_val):
-            value = -t_val * np.exp(+1j*2*np.sqrt(3)*k_val[1]/6)
+            value = _polar(-t_val, np.sqrt(3)/3*k_val[..., 1])
             return value
 
-        upper_diag_array = np.array([A(t_val, nphi, m, k_val) for m in range(q_val)])
-        ham += np.roll(np.diag(upper_diag_array), 0, axis=1)
+        upper_diag_array = A(t_val, flux, m, k_val)
+        _add_diag(ham, upper_diag_array)
 
-        upper_diag_array2 = np.array([B_plus(t_val, k_val) for _ in range(q_val)])
-        ham += np.roll(np.diag(upper_diag_array2), 1, axis=1)
+        upper_diag_array2 = np.broadcast_to(B_plus(t_val, k_val), (q_val,) + np.shape(k_val)[:-1])
+        _add_diag(ham, upper_diag_array2, 1)
 
         return ham
 
-    AA_block = np.zeros((q, q))
-    AB_block = AB_block_func(t[0], p, q, k)
-    BA_block = BA_block_func(t[0], p, q, k)
-    BB_block = np.zeros((q, q))
-
-    upper = np.concatenate((AA_block, AB_block), axis=1)
-    lower = np.concatenate((BA_block, BB_block), axis=1)
-    Hamiltonian = np.concatenate((upper, lower), axis=0)
+    # the sublattice blocks are written into views of a single preallocated matrix (AA and BB vanish)
+    Hamiltonian = np.zeros(np.shape(k)[:-1] + (2*q, 2*q), dtype=dtype)
+    BA_block_func(t[0], p, q, k, Hamiltonian[..., q:, :q])
+    # the upper block is the conjugate transpose of the lower block
+    Hamiltonian[..., :q, q:] = np.conj(np.swapaxes(Hamiltonian[..., q:, :q], -1, -2))
 
     return Hamiltonian
 
 
-def BasicKagomeHamiltonian(t, p, q, k, period):
+def BasicKagomeHamiltonian(t, p, q, k, period, dtype=np.complex128):
     r"""The basic kagome lattice Hofstadter Hamiltonian.
 
     The Hofstadter Hamiltonian for the kagome lattice with nearest-neighbor hopping.
@@ -539,174 +730,113 @@ def BasicKagomeHamiltonian(t, p, q, k, period):
     q: int
         The denominator of the flux density.
     k: ndarray
-        The momentum vector.
+        The momentum vector, or an array of momentum vectors with dimension (..., 2).
     period: int
         The factor by which to divide A_UC in the flux density.
+    dtype: type
+        The complex data type of the Hamiltonian matrix (default=np.complex128).
 
     Returns
     -------
     Hamiltonian: ndarray
-        The Hofstadter Hamiltonian matrix of dimension :math:`3q \times 3q`.
+        The Hofstadter Hamiltonian matrix of dimension :math:`3q \times 3q`, preceded by the leading dimensions of k.
     """
 
-    def AB_block_func(t_val, p_val, q_val, k_val):
-        ham = np.zeros((q_val, q_val), dtype=np.complex128)
+    def BA_block_func(t_val, p_val, q_val, k_val, ham):
         nphi = p_val / q_val
+        flux = np.pi*period*nphi
+        m = _y_positions(q_val, k_val)
 
-        def A(t_val, nphi_val, m_val, k_val):
-            value = (-t_val*np.exp(-1j*np.pi*period*nphi_val*m_val + 1j*k_val[0]/2)
-                     -t_val*np.exp(+1j*np.pi*period*nphi_val*m_val - 1j*k_val[0]/2))
+        def A(t_val, flux_val, m_val, k_val):
+            # the two hoppings are complex conjugates, so they combine into a real cosine
+            value = -2*t_val*np.cos(flux_val*m_val - 0.5*k_val[..., 0])
             return value
 
-        upper_diag_array = np.array([A(t_val, nphi, m, k_val) for m in range(q_val)])
-        ham += np.roll(np.diag(upper_diag_array), 0, axis=1)
+        upper_diag_array = A(t_val, flux, m, k_val)
+        _add_diag(ham, upper_diag_array)
 
         return ham
 
-    def AC_block_func(t_val, p_val, q_val, k_val):
-        ham = np.zeros((q_val, q_val), dtype=np.complex128)
+    def CA_block_func(t_val, p_val, q_val, k_val, ham):
         nphi = p_val / q_val
+        flux = 0.5*np.pi*period*nphi
+        m = _y_positions(q_val, k_val)
+        k_phase = (k_val[..., 0] + np.sqrt(3)*k_val[..., 1]) / 4  # momentum phase shared by both hoppings
 
-        def A(t_val, nphi_val, m_val, k_val):
-            value = -t_val*np.exp(-1j*np.pi*period*nphi_val*0.5*(m_val + 1/4) + 1j*(k_val[0]/4 + np.sqrt(3)*k_val[1]/4))
+        def A(t_val, flux_val, m_val, k_phase_val):
+            value = _polar(-t_val, flux_val*(m_val + 1/4) - k_phase_val)
             return value
 
-        def B_minus(t_val, nphi_val, m_val, k_val):
-            value = -t_val*np.exp(+1j*np.pi*period*nphi_val*0.5*(m_val - 1/4) - 1j*(k_val[0]/4 + np.sqrt(3)*k_val[1]/4))
+        def B_plus(t_val, flux_val, m_val, k_phase_val):
+            value = _polar(-t_val, k_phase_val - flux_val*(m_val + 3/4))
             return value
 
-        upper_diag_array = np.array([A(t_val, nphi, m, k_val) for m in range(q_val)])
-        ham += np.roll(np.diag(upper_diag_array), 0, axis=1)
-
-        upper_diag_array2 = np.array([B_minus(t_val, nphi, m, k_val) for m in range(q_val)])
-        ham += np.roll(np.diag(upper_diag_array2), 1, axis=0)
-
-        return ham
-
-    def BA_block_func(t_val, p_val, q_val, k_val):
-        ham = np.zeros((q_val, q_val), dtype=np.complex128)
-        nphi = p_val / q_val
+        upper_diag_array = A(t_val, flux, m, k_phase)
+        _add_diag(ham, upper_diag_array)
 
-        def A(t_val, nphi_val, m_val, k_val):
-            value = (-t_val*np.exp(-1j*np.pi*period*nphi_val*m_val + 1j*k_val[0]/2)
-                     -t_val*np.exp(+1j*np.pi*period*nphi_val*m_val - 1j*k_val[0]/2))
-            return value
-
-        upper_diag_array = np.array([A(t_val, nphi, m, k_val) for m in range(q_val)])
-        ham += np.roll(np.diag(upper_diag_array), 0, axis=1)
+        upper_diag_array2 = B_plus(t_val, flux, m, k_phase)
+        _add_diag(ham, upper_diag_array2, 1)
 
         return ham
 
-    def BC_block_func(t_val, p_val, q_val, k_val):
-        ham = np.zeros((q_val, q_val), dtype=np.complex128)
+    def CB_block_func(t_val, p_val, q_val, k_val, ham):
         nphi = p_val / q_val
+        flux = 0.5*np.pi*period*nphi
+        m = _y_positions(q_val, k_val)
+        k_phase = (k_val[..., 0] - np.sqrt(3)*k_val[..., 1]) / 4  # momentum phase shared by both hoppings
 
-        def A(t_val, nphi_val, m_val, k_val):
-            value = -t_val*np.exp(+1j*np.pi*period*nphi_val*0.5*(m_val + 1/4) + 1j*(-k_val[0]/4+np.sqrt(3)*k_val[1]/4))
+        def A(t_val, flux_val, m_val, k_phase_val):
+            value = _polar(-t_val, k_phase_val - flux_val*(m_val + 1/4))
             return value
 
-        def B_minus(t_val, nphi_val, m_val, k_val):
-            value = -t_val*np.exp(-1j*np.pi*period*nphi_val*0.5*(m_val - 1/4) + 1j*(+k_val[0]/4-np.sqrt(3)*k_val[1]/4))
+        def B_plus(t_val, flux_val, m_val, k_phase_val):
+            value = _polar(-t_val, flux_val*(m_val + 3/4) - k_phase_val)
             return value
 
-        upper_diag_array = np.array([A(t_val, nphi, m, k_val) for m in range(q_val)])
-        ham += np.roll(np.diag(upper_diag_array), 0, axis=1)
+        upper_diag_array = A(t_val, flux, m, k_phase)
+        _add_diag(ham, upper_diag_array)
 
-        upper_diag_array2 = np.array([B_minus(t_val, nphi, m, k_val) for m in range(q_val)])
-        ham += np.roll(np.diag(upper_diag_array2), 1, axis=0)
+        upper_diag_array2 = B_plus(t_val, flux, m, k_phase)
+        _add_diag(ham, upper_diag_array2, 1)
 
         return ham
 
-    def CA_block_func(t_val, p_val, q_val, k_val):
-        ham = np.zeros((q_val, q_val), dtype=np.complex128)
-        nphi = p_val / q_val
-
-        def A(t_val, nphi_val, m_val, k_val):
-            value = -t_val*np.exp(+1j*np.pi*period*nphi_val*0.5*(m_val + 1/4) - 1j*(k_val[0]/4+np.sqrt(3)*k_val[1]/4))
-            return value
-
-        def B_plus(t_val, nphi_val, m_val, k_val):
-            value = -t_val*np.exp(-1j*np.pi*period*nphi_val*0.5*(m_val + 3/4) + 1j*(k_val[0]/4+np.sqrt(3)*k_val[1]/4))
-            return value
-
-        upper_diag_array = np.array([A(t_val, nphi, m, k_val) for m in range(q_val)])
-        ham += np.roll(np.diag(upper_diag_array), 0, axis=1)
-
-        upper_diag_array2 = np.array([B_plus(t_val, nphi, m, k_val) for m in range(q_val)])
-        ham += np.roll(np.diag(upper_diag_array2), 1, axis=1)
-
-        return ham
-
-    def CB_block_func(t_val, p_val, q_val, k_val):
-        ham = np.zeros((q_val, q_val), dtype=np.complex128)
-        nphi = p_val / q_val
-
-        def A(t_val, nphi_val, m_val, k_val):
-            value = -t_val*np.exp(-1j*np.pi*period*nphi_val*0.5*(m_val + 1/4) + 1j*(k_val[0]/4-np.sqrt(3)*k_val[1]/4))
-            return value
-
-        def B_plus(t_val, nphi_val, m_val, k_val):
-            value = -t_val*np.exp(+1j*np.pi*period*nphi_val*0.5*(m_val + 3/4) + 1j*(-k_val[0]/4+np.sqrt(3)*k_val[1]/4))
-            return value
-
-        upper_diag_array = np.array([A(t_val, nphi, m, k_val) for m in range(q_val)])
-        ham += np.roll(np.diag(upper_diag_array), 0, axis=1)
-
-        upper_diag_array2 = np.array([B_plus(t_val, nphi, m, k_val) for m in range(q_val)])
-        ham += np.roll(np.diag(upper_diag_array2), 1, axis=1)
-
-        return ham
-
-    AA_block = np.zeros((q, q))
-    AB_block = AB_block_func(t[0], p, q, k)
-    AC_block = AC_block_func(t[0], p, q, k)
-    #
-    BA_block = BA_block_func(t[0], p, q, k)
-    BB_block = np.zeros((q, q))
-    BC_block = BC_block_func(t[0], p, q, k)
-    #
-    CA_block = CA_block_func(t[0], p, q, k)
-    CB_block = CB_block_func(t[0], p, q, k)
-    CC_block = np.zeros((q, q))
-
-    upper = np.concatenate((AA_block, AB_block, AC_block), axis=1)
-    middle = np.concatenate((BA_block, BB_block, BC_block), axis=1)
-    lower = np.concatenate((CA_block, CB_block, CC_block), axis=1)
-    Hamiltonian = np.concatenate((upper, middle, lower), axis=0)
+    # the sublattice blocks are written into views of a single preallocated matrix (AA, BB, and CC vanish)
+    Hamiltonian = np.zeros(np.shape(k)[:-1] + (3*q, 3*q), dtype=dtype)
+    A_idx, B_idx, C_idx = slice(0, q), slice(q, 2*q), slice(2*q, 3*q)
+    BA_block_func(t[0], p, q, k, Hamiltonian[..., B_idx, A_idx])
+    CA_block_func(t[0], p, q, k, Hamiltonian[..., C_idx, A_idx])
+    CB_block_func(t[0], p, q, k, Hamiltonian[..., C_idx, B_idx])
+    # the upper blocks are the conjugate transposes of the lower blocks
+    for (row_idx, col_idx) in [(A_idx, B_idx), (A_idx, C_idx), (B_idx, C_idx)]:
+        Hamiltonian[..., row_idx, col_idx] = np.conj(np.swapaxes(Hamiltonian[..., col_idx, row_idx], -1, -2))
 
     return Hamiltonian
 
 
 if __name__ == '__main__':
 
-    t = [1, 0, -0.25]
-
-    vec_group = nearest_neighbor_finder("square", t)
-
-    print(vec_group)
+    # plotting libraries are only needed for this demo
+    import matplotlib.pyplot as plt
+    from mpl_toolkits.mplot3d import axes3d
 
-    ###
+    t = [1]
+    p, q = 1, 5
 
-    num_bands = 5
+    num_bands = q
     num_samples = 101
 
-    b1 = (2. * np.pi) * np.array([1 / num_bands, 0])
-    b2 = (2. * np.pi) * np.array([0, 1])
-    bvec = np.vstack((b1, b2))
+    bvec = reciprocal_vectors(np.array([[1, 0], [0, q]]))
+
+    # construct the momentum grid with dimension (num_samples, num_samples, 2)
+    frac_k = np.linspace(0, 1, num_samples)
+    frac_grid = np.stack(np.meshgrid(frac_k, frac_k, indexing='ij'), axis=-1)
+    k_grid = np.einsum('...j,jk->...k', frac_grid, bvec)
 
-    eigenvalues = np.zeros((num_bands, num_samples, num_samples))  # real
-    eigenvectors = np.zeros((num_bands, num_bands, num_samples, num_samples), dtype=np.complex128)  # complex
-    for band in range(num_bands):
-        for idx_x in range(num_samples):
-            frac_kx = idx_x / (num_samples - 1)
-            for idx_y in range(num_samples):
-                frac_ky = idx_y / (num_samples - 1)
-                k = np.matmul(np.array([frac_kx, frac_ky]), bvec)
-                # print("k = ", k)
-                eigvals, eigvecs = np.linalg.eigh(Hamiltonian(t, 1, num_bands, vec_group, k))
-                idx = np.argsort(eigvals)
-                eigenvalues[band, idx_x, idx_y] = eigvals[idx[band]]
-                eigenvectors[:, band, idx_x, idx_y] = eigvecs[:, idx[band]]
+    # diagonalize the Hamiltonians on the full momentum grid in a single batched call
+    eigvals, eigvecs = np.linalg.eigh(BasicSquareHamiltonian(t, p, q, k_grid, 1))
+    eigenvalues = np.moveaxis(eigvals, -1, 0)  # (num_bands, num_samples, num_samples)
+    eigenvectors = np.moveaxis(eigvecs, (-2, -1), (0, 1))  # (num_bands, num_bands, num_samples, num_samples)
 
     fig = plt.figure()
     ax = fig.add_subplot(111, projection='3d')
@@ -4,8 +4,6 @@ import numpy as np
 import matplotlib.pyplot as plt
 import matplotlib.ticker as ticker
 import os
-from matplotlib.ticker import MaxNLocator
-from copy import deepcopy
 import matplotlib.colors as mcolors
 from mpl_toolkits.mplot3d import axes3d
 from matplotlib import rcParams
@@ -105,8 +103,7 @@ def band_structure(model, args, data):
         fig3.canvas.manager.set_window_title('Band Structure (2D)')
         ax3 = fig3.add_subplot(111)
         ax3.set_title(f"$n_\\phi = {nphi[0]}/{nphi[1]}$")
-        for i in range(num_bands):
-            ax3.plot(eigenvalues_2D[i])
+        ax3.plot(eigenvalues_2D.T)  # a single call, which plots each band as a column
         locations, labels = [0], [sym_points[0][0]]
         for i in range(1, num_paths):
             ax3.axvline(i*points_per_path, color='k', linewidth=0.5, ls='--')
@@ -211,7 +208,8 @@ def butterfly(model, args, data):
             colors = np.vstack((colors1, colors2, colors3))
             cmap = mcolors.LinearSegmentedColormap.from_list('avron', colors, 21)
     if col == "point":
-        sc = ax.scatter(nphi_list, E_list, c=chern_list, cmap=cmap, s=ps*7*(199/q), marker='.', vmin=-10, vmax=10, linewidths=0)
+        sc = ax.scatter(nphi_list, E_list, c=chern_list, cmap=cmap, s=ps*7*(199/q), marker='.', vmin=-10, vmax=10, linewidths=0,
+                        rasterized=True)
         if not art:
             cbar = plt.colorbar(sc, extend='both')
             cbar.set_label("$C$")
@@ -231,9 +229,8 @@ def butterfly(model, args, data):
             cbar.set_ticks(tick_locs)
             cbar.set_ticklabels(cbar_tick_label)
     else:
-        nphi_list = list(np.concatenate(nphi_list).ravel())
-        E_list = list(np.concatenate(E_list).ravel())
-        ax.scatter(nphi_list, E_list, s=ps*7*(199/q), marker='.', linewidths=0)
+        # the points are drawn as a single rasterized collection, which keeps vector output small for large q
+        ax.scatter(np.ravel(nphi_list), np.ravel(E_list), s=ps*7*(199/q), marker='.', linewidths=0, rasterized=True)
 
     if not art:
         ax.set_ylabel('$E$')
@@ -254,16 +251,16 @@ def butterfly(model, args, data):
         else:
             ax2.set_xlim([0, 1])
 
-        nphi_DOS_list = list(np.concatenate(nphi_DOS_list).ravel())
-        DOS_list = list(np.concatenate(DOS_list).ravel())
-        gaps_list = list(np.concatenate(gaps_list).ravel())
+        nphi_DOS_list = np.ravel(nphi_DOS_list)
+        DOS_list = np.ravel(DOS_list)
+        gaps_list = np.ravel(gaps_list)
 
         if not col:
-            ax2.scatter(nphi_DOS_list, DOS_list, s=[5*i for i in gaps_list], c='r', linewidths=0)
+            ax2.scatter(nphi_DOS_list, DOS_list, s=5*gaps_list, c='r', linewidths=0, rasterized=True)
         else:
-            tr_DOS_list = list(np.concatenate(tr_DOS_list).ravel())
-            sc2 = ax2.scatter(nphi_DOS_list, DOS_list, s=[10 * i for i in gaps_list], c=tr_DOS_list, cmap=cmap,
-                              linewidths=0, vmin=-10, vmax=10)
+            tr_DOS_list = np.ravel(tr_DOS_list)
+            sc2 = ax2.scatter(nphi_DOS_list, DOS_list, s=10*gaps_list, c=tr_DOS_list, cmap=cmap,
+                              linewidths=0, vmin=-10, vmax=10, rasterized=True)
             if not art:
                 cbar2 = plt.colorbar(sc2, extend='both')
                 cbar2.set_label("$t$")
@@ -0,0 +1,9 @@
+"""Thread settings for the programs.
+
+The programs distribute independent diagonalizations over a thread pool, so each BLAS call is limited to a single thread. This module must be imported before numpy. Values already set in the environment are kept.
+"""
+
+import os
+
+for var in ["OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS"]:
+    os.environ.setdefault(var, "1")
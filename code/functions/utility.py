@@ -59,6 +59,7 @@ def create_filename(program, args, aux_text=""):
     log = args['log']
     period = args['periodicity']
     dpi = args['dpi']
+    prec = args.get('precision', 'double')  # older files do not store the precision
 
     aux_str = aux_text if aux_text == "" else aux_text+"_"
     a_str = f"a_{a:g}_" if a != 1 else ""
@@ -66,6 +67,7 @@ def create_filename(program, args, aux_text=""):
     brav_str = f"alpha_{alpha:g}_theta_{theta[0]:g}_{theta[1]:g}_" if lat not in ["square", "triangular"] else ""
     per_str = f"period_{period:g}_" if period != 1 else ""
     dpi_str = f"dpi_{dpi:g}_" if dpi != 300 else ""
+    prec_str = f"{prec}_" if prec != "double" else ""
 
     if program == "band_structure":
         samp = args['samp']
@@ -80,7 +82,7 @@ def create_filename(program, args, aux_text=""):
         bgt_str = f"bgt_{bgt:g}_"
         samp_str = f"samp_{samp:g}_" if samp != 101 else ""
 
-        filename = f"band_structure_{aux_str}{disp_str}{mod_str}{lat}_{nphi_str}{a_str}{t_str}{brav_str}{per_str}{samp_str}{dpi_str}"[:-1]
+        filename = f"band_structure_{aux_str}{disp_str}{mod_str}{lat}_{nphi_str}{a_str}{t_str}{brav_str}{per_str}{prec_str}{samp_str}{dpi_str}"[:-1]
 
     elif program == "butterfly":
         plt_lat = args["plot_lattice"]
@@ -94,7 +96,7 @@ def create_filename(program, args, aux_text=""):
         col_str = f"col_{color}_{pal}_" if color else ""
         art_str = "art_" if art else ""
 
-        filename = f"butterfly_{aux_str}{lat}_{q_str}{a_str}{t_str}{brav_str}{col_str}{per_str}{art_str}{dpi_str}"[:-1]
+        filename = f"butterfly_{aux_str}{lat}_{q_str}{a_str}{t_str}{brav_str}{col_str}{per_str}{prec_str}{art_str}{dpi_str}"[:-1]
 
     else:
         raise ValueError("program is not defined")
@@ -119,7 +121,10 @@ def save_data(program, model, args, data):
 
     directory = f"../data/{program}/" if os.path.isdir(f"../data/{program}/") else ""
     filename = create_filename(program, args)
-    np.savez_compressed(directory+filename, model=model, args=args, data=data)
+    # numeric arrays are stored as separate entries, so that they can be loaded without unpickling
+    arrays = {f"data_{key}": val for key, val in data.items() if isinstance(val, np.ndarray) and val.dtype != object}
+    other = {key: val for key, val in data.items() if f"data_{key}" not in arrays}
+    np.savez_compressed(directory+filename, model=model, args=args, data=other, **arrays)
 
     return None
 
@@ -136,10 +141,12 @@ def load_data(program, filename):
     """
 
     directory = f"../data/{program}/" if os.path.isdir(f"../data/{program}/") else ""
-    file_data = np.load(directory+filename, allow_pickle=True)
-    model = file_data['model'].item()  # .item() unpacks 0-dim array
-    args = file_data['args'].item()
-    data = file_data['data'].item()
+    with np.load(directory+filename, allow_pickle=True) as file_data:
+        model = file_data['model'].item()  # .item() unpacks 0-dim array
+        args = file_data['args'].item()
+        data = file_data['data'].item()
+        # numeric arrays are stored as separate entries (older files store them in the data dictionary)
+        data.update({key[len("data_"):]: file_data[key] for key in file_data.files if key.startswith("data_")})
 
     return model, args, data
 
@@ -18,7 +18,7 @@ class Hofstadter:
     where :math:`\braket{\dots}_\kappa` denotes :math:`\kappa`-th nearest neighbors on some regular Euclidean lattice in the xy-plane, :math:`t_\kappa` are the corresponding hopping amplitudes, :math:`\theta_{ij}` are the Peierls phases, and :math:`c^{(\dagger)}` are the particle (creation)annihilation operators.
     """
 
-    def __init__(self, p, q, a0=1, t=None, lat="bravais", alpha=1, theta=(1, 3), period=1):
+    def __init__(self, p, q, a0=1, t=None, lat="bravais", alpha=1, theta=(1, 3), period=1, dtype=np.complex128):
         """Constructor for the Hofstadter class.
 
         Parameters
@@ -39,6 +39,8 @@ class Hofstadter:
             The angle between Bravais lattice vectors in units of pi (default=(1, 3)).
         period: int
             The factor by which to divide A_UC in the flux density (default=1).
+        dtype: type
+            The complex data type of the Hamiltonian, e.g. np.complex64 for single precision (default=np.complex128).
         """
 
         if t is None:
@@ -53,6 +55,12 @@ class Hofstadter:
         self.theta1 = theta[1]  #: int : The denominator of the fractional angle between Bravais lattice vectors in units of pi (default=3).
         self.theta = (theta[0]/theta[1])*np.pi  #: float : The angle between Bravais lattice vectors (default=pi/3).
         self.period = period  #: int : The factor by which to divide A_UC in the flux density (default=1).
+        self.dtype = dtype  #: type : The complex data type of the Hamiltonian (default=np.complex128).
+
+    def __getstate__(self):
+        """Exclude the cached unit cell, nearest neighbors, and Peierls tables when pickling (e.g. when saving data)."""
+
+        return {key: val for key, val in self.__dict__.items() if not key.endswith("_cache")}
 
     def unit_cell(self):
         """The unit cell of the Hofstadter model.
@@ -71,6 +79,9 @@ class Hofstadter:
             The high-symmetry points.
         """
 
+        if "_unit_cell_cache" in self.__dict__:  # the unit cell is fixed at construction
+            return self._unit_cell_cache
+
         if self.lat == "square":
             # lattice vectors
             a1 = self.a0 * np.array([1, 0])
@@ -199,7 +210,12 @@ class Hofstadter:
 
         num_bands_val = len(abasisvec_val) * self.q
 
-        return num_bands_val, avec_val, abasisvec_val, bMUCvec_val, sym_points_val
+        # the cached arrays are shared between calls
+        for val in (avec_val, abasisvec_val, bMUCvec_val):
+            val.setflags(write=False)
+        self._unit_cell_cache = (num_bands_val, avec_val, abasisvec_val, bMUCvec_val, sym_points_val)
+
+        return self._unit_cell_cache
 
     def hamiltonian(self, k_val):
         """The Hamiltonian of the Hofstadter model.
@@ -207,51 +223,56 @@ class Hofstadter:
         Parameters
         ----------
         k_val: ndarray
-            The momentum vector.
+            The momentum vector, or an array of momentum vectors with dimension (..., 2).
 
         Returns
         -------
         Hamiltonian: ndarray
-            The Hofstadter Hamiltonian matrix of dimension (num_bands, num_bands).
+            The Hofstadter Hamiltonian matrix of dimension (..., num_bands, num_bands), with data type dtype.
         """
 
+        dtype = getattr(self, "dtype", np.complex128)  # instances loaded from older pickles do not have a dtype
+
         if self.lat == "square" and len(self.t) == 1:
-            Hamiltonian = fm.BasicSquareHamiltonian(self.t, self.p, self.q, k_val, self.period)
+            Hamiltonian = fm.BasicSquareHamiltonian(self.t, self.p, self.q, k_val, self.period, dtype)
         elif self.lat == "triangular" and len(self.t) == 1:
-            Hamiltonian = fm.BasicTriangularHamiltonian(self.t, self.p, self.q, k_val, self.period)
+            Hamiltonian = fm.BasicTriangularHamiltonian(self.t, self.p, self.q, k_val, self.period, dtype)
         elif self.lat == "honeycomb" and len(self.t) == 1 and self.alpha == 1 and self.theta0 == 1 and self.theta1 == 3:
-            Hamiltonian = fm.BasicHoneycombHamiltonian(self.t, self.p, self.q, k_val, self.period)
+            Hamiltonian = fm.BasicHoneycombHamiltonian(self.t, self.p, self.q, k_val, self.period, dtype)
         elif self.lat == "kagome" and len(self.t) == 1 and self.alpha == 1 and self.theta0 == 1 and self.theta1 == 3:
-            Hamiltonian = fm.BasicKagomeHamiltonian(self.t, self.p, self.q, k_val, self.period)
+            Hamiltonian = fm.BasicKagomeHamiltonian(self.t, self.p, self.q, k_val, self.period, dtype)
         else:  # general case
+            vec_group_matrix, A_UC = self._nearest_neighbors()
+            if "_tables_cache" not in self.__dict__:  # the Peierls tables only depend on the flux density
+                self._tables_cache = fm.hamiltonian_tables(self.t, self.p, self.q, A_UC, vec_group_matrix)
+            Hamiltonian = fm.Hamiltonian(self.t, self.p, self.q, A_UC, vec_group_matrix, k_val, self._tables_cache, dtype)
+
+        return Hamiltonian
+
+    def _nearest_neighbors(self):
+        """The nearest neighbors of the Hofstadter model, grouped by sublattices and dJ.
+
+        The result only depends on the lattice geometry and is therefore computed once and cached on the instance (the grouping itself is also shared between instances with the same geometry, e.g. across flux densities).
+
+        Returns
+        -------
+        vec_group_matrix: ndarray
+            The matrix of nearest neighbor arrays grouped by dJ, indexed by the initial and final sublattices.
+        A_UC: float
+            The unit cell area in units of a (scaled by periodicity factor).
+        """
+
+        if "_nn_cache" not in self.__dict__:  # also covers instances loaded from older pickles
             _, avec, abasisvec, _, _ = self.unit_cell()
 
-            data0, bases = fm.nearest_neighbor_finder(avec, abasisvec, self.t, 0, 0, 0)
-            data = [data0]
-
-            len_bases = len(bases)
-            if len_bases > 1:
-                for i, val in enumerate(bases[1:]):
-                    data_set, _ = fm.nearest_neighbor_finder(avec, abasisvec, self.t, abasisvec[i+1][0], abasisvec[i+1][1], val)
-                    data.append(data_set)
-            data = np.vstack(data)
-
-            vec_group_matrix = np.zeros((len_bases, len_bases), dtype=object)
-            for i in range(len_bases):  # initial sublattice
-                mask_i = (data[:, 10] == i)
-                data_mask_i = data[mask_i, :]
-                for j in range(len_bases):  # final sublattice
-                    mask_j = (data_mask_i[:, 11] == j)
-                    data_mask_ij = data_mask_i[mask_j, :]
-                    vec_group_list = fm.nearest_neighbor_sorter(data_mask_ij)
-                    vec_group_matrix[i, j] = vec_group_list
+            vec_group_matrix = fm.nearest_neighbor_groups(avec, abasisvec, self.t)
 
             # compute A_UC in units of a (scaled by periodicity factor)
             A_UC = np.linalg.norm(avec[1]) / self.period
 
-            Hamiltonian = fm.Hamiltonian(self.t, self.p, self.q, A_UC, vec_group_matrix, k_val)
+            self._nn_cache = (vec_group_matrix, A_UC)
 
-        return Hamiltonian
+        return self._nn_cache
 
     def plot_lattice(self):
         """Plot the lattice."""
@@ -288,15 +309,12 @@ class Hofstadter:
         ax.set_title(f"$t$ = {t_list}")
 
         # plot grid points
-        r_list = []
-        for i, val in enumerate(vectors):
-            r = np.linalg.norm(val[0])
-            if r != 0:
-                r_list.append(r)
-            ax.scatter(val[0][0], val[0][1], c='k', s=5)
+        positions = np.array([val[0] for val in vectors])
+        ax.scatter(positions[:, 0], positions[:, 1], c='k', s=5)
 
         # plot nearest neighbors
-        r_list = np.sort(list(set(r_list)))
+        r_list = np.linalg.norm(positions, axis=1)
+        r_list = np.unique(r_list[r_list != 0])
         r_used = []
         for i, r in enumerate(r_list):
             if i >= len(t_list):
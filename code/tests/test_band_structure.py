@@ -2,6 +2,8 @@
 
 import numpy as np
 import functions.models as fm
+import functions.band_structure as fbs
+import functions.butterfly as fb
 from models.hofstadter import Hofstadter
 
 
@@ -217,3 +219,73 @@ def test_kagome():
 
     assert np.allclose(eigenvalues, eigenvalues_ref)
     assert np.allclose(np.abs(eigenvectors), np.abs(eigenvectors_ref))
+
+
+def test_batched_hamiltonian():
+    """Check that the Hamiltonian evaluated on an array of momenta matches the Hamiltonian evaluated at each momentum."""
+
+    lattices = [([1], "square", 1), ([1, 0, -0.25], "square", 1), ([1], "triangular", 1), ([0.5, 0.2], "bravais", 1),
+                ([1], "honeycomb", 1), ([0, 1], "honeycomb", 1), ([1], "kagome", 8)]
+    k = np.random.default_rng(0).uniform(-np.pi, np.pi, size=(3, 4, 2))
+
+    for t, lat, period in lattices:
+        model = Hofstadter(1, 5, t=t, lat=lat, period=period)
+        # current
+        ham_batch = model.hamiltonian(k)
+        # reference
+        ham_single = np.array([[model.hamiltonian(k_val) for k_val in k_row] for k_row in k])
+
+        assert np.allclose(ham_batch, ham_single)
+
+
+def test_single_precision():
+    """Check that the single precision Hamiltonian reproduces the double precision spectrum."""
+
+    k = np.random.default_rng(0).uniform(-np.pi, np.pi, size=(4, 2))
+
+    for t, lat in [([1], "square"), ([1, 0, -0.25], "square"), ([1], "honeycomb"), ([1], "kagome")]:
+        # current
+        model = Hofstadter(1, 5, t=t, lat=lat, dtype=np.complex64)
+        ham = model.hamiltonian(k)
+        # reference
+        model_ref = Hofstadter(1, 5, t=t, lat=lat)
+        ham_ref = model_ref.hamiltonian(k)
+
+        assert ham.dtype == np.complex64
+        assert np.allclose(np.linalg.eigvalsh(ham), np.linalg.eigvalsh(ham_ref), atol=1e-5)
+
+
+def test_single_precision_chern():
+    """Check that the band structure in single precision reproduces the Chern numbers."""
+
+    def chern_numbers(model, samp=21):
+        _, _, _, bMUCvec, _ = model.unit_cell()
+        frac_kx, frac_ky = np.meshgrid(np.arange(samp) / (samp-1), np.arange(samp) / (samp-1), indexing='ij')
+        k = np.matmul(np.stack((frac_kx, frac_ky), axis=-1), bMUCvec)
+        _, eigvecs = np.linalg.eigh(model.hamiltonian(k))
+        eigenvectors = np.transpose(eigvecs, (2, 3, 0, 1))  # (num_bands, num_bands, samp, samp)
+        idx_x, idx_y = np.meshgrid(np.arange(samp - 1), np.arange(samp - 1), indexing='ij')
+        cherns = [np.sum(fbs.berry_curv(eigenvectors, band, idx_x, idx_y)) / (2*np.pi) for band in range(np.shape(eigenvectors)[1])]
+        return eigenvectors.dtype, np.array(cherns)
+
+    for lat in ["square", "triangular"]:
+        # current
+        dtype, cherns = chern_numbers(Hofstadter(1, 5, lat=lat, dtype=np.complex64))
+        # reference
+        _, cherns_ref = chern_numbers(Hofstadter(1, 5, lat=lat))
+
+        assert dtype == np.complex64
+        assert np.allclose(cherns, np.round(cherns), atol=1e-3)
+        assert np.array_equal(np.round(cherns), np.round(cherns_ref))
+        assert sorted(np.round(cherns)) == sorted(fb.chern(1, 5)[0])
+
+
+def test_hermitian():
+    """Check that the Hamiltonians with further-neighbor hoppings are exactly Hermitian."""
+
+    k = np.random.default_rng(0).uniform(-np.pi, np.pi, size=(4, 2))
+
+    for t, lat in [([1, 0.3], "kagome"), ([1, 0.3, 0.2], "kagome"), ([1, 0.5], "honeycomb")]:
+        ham = Hofstadter(1, 5, t=t, lat=lat).hamiltonian(k)
+
+        assert np.allclose(ham, ham.conj().swapaxes(-1, -2))
@@ -3,6 +3,7 @@
 import numpy as np
 from math import gcd
 from models.hofstadter import Hofstadter
+import functions.butterfly as fb
 
 
 def butterfly(q, t, lat, alpha=1, theta=(1, 3), period=1):
@@ -221,3 +222,39 @@ def test_kagome():
     reference = np.array([nphi_list_ref, E_list_ref])
 
     assert np.allclose(current, reference)
+
+
+def test_eigenvalues():
+    """Check the structured eigensolver against dense diagonalization for stacks of Hamiltonians."""
+
+    q = 11
+    cases = [("honeycomb", [1], (1, 3)), ("square", [1], (1, 3)), ("kagome", [1], (1, 3)), ("bravais", [0.5, 0.2], (67, 180))]
+    for lat, t, theta in cases:
+        hams = np.stack([Hofstadter(p, q, t=t, lat=lat, theta=theta).hamiltonian(np.array([0, 0])) for p in range(1, q)])
+        assert np.allclose(fb.eigenvalues(hams, q), np.sort(np.linalg.eigvalsh(hams), axis=-1))
+
+    # mixed real and complex stack
+    model = Hofstadter(3, q, lat="square")
+    hams = np.stack([model.hamiltonian(np.array([0, 0])), model.hamiltonian(np.array([0.3, 0.7]))])
+    assert np.any(np.imag(hams[1])) and not np.any(np.imag(hams[0]))
+    assert np.allclose(fb.eigenvalues(hams, q), np.sort(np.linalg.eigvalsh(hams), axis=-1))
+
+    # single precision stack
+    hams = np.stack([Hofstadter(p, q, lat="honeycomb", dtype=np.complex64).hamiltonian(np.array([0.3, 0.7])) for p in range(1, q)])
+    assert hams.dtype == np.complex64
+    assert np.allclose(fb.eigenvalues(hams, q), np.sort(np.linalg.eigvalsh(hams.astype(np.complex128)), axis=-1), atol=1e-4)
+
+
+def test_spectra_mirror():
+    """Check that the spectra reused across the mirror symmetry agree with direct diagonalization."""
+
+    q = 13
+    ps = list(range(1, q))
+    for lat, mirror in [("square", True), ("triangular", False)]:
+        def model_func(p):
+            return Hofstadter(p, q, lat=lat)
+
+        assert fb.mirror_symmetric(model_func, q) == mirror
+        E_list = np.array([lmbda for _, lmbda in fb.spectra(model_func, ps, q, chunk_size=5)])
+        E_list_ref = np.array([np.sort(np.linalg.eigvalsh(model_func(p).hamiltonian(np.array([0, 0])))) for p in ps])
+        assert np.allclose(E_list, E_list_ref)
@@ -0,0 +1,72 @@
+"""Unit tests for the utility functions."""
+
+import os
+import numpy as np
+import functions.utility as fu
+from models.hofstadter import Hofstadter
+
+
+def butterfly_args(**kwargs):
+    """Minimal arguments dictionary of the butterfly program.
+
+    Parameters
+    ----------
+    kwargs: dict
+        The arguments to overwrite.
+
+    Returns
+    -------
+    args: dict
+        The dictionary of input arguments.
+    """
+
+    args = {'model': "Hofstadter", 'a': 1, 't': [1], 'input': False, 'lattice': "square", 'alpha': 1, 'theta': [1, 3],
+            'save': True, 'log': False, 'plot_lattice': False, 'periodicity': 1, 'dpi': 300, 'point_size': 1,
+            'q': 7, 'color': False, 'palette': "avron", 'wannier': False, 'art': False, 'precision': "double", 'load': False}
+    args.update(kwargs)
+
+    return args
+
+
+def test_filename_without_precision():
+    """Check that the filename can be created from the arguments of a file saved before the precision option existed."""
+
+    args = butterfly_args()
+    del args['precision']
+
+    assert fu.create_filename("butterfly", args) == "butterfly_square_q_7_t_1"
+    assert fu.create_filename("butterfly", butterfly_args(precision="single")) == "butterfly_square_q_7_t_1_single"
+
+
+def test_data_round_trip(tmp_path, monkeypatch):
+    """Check that data saved with numeric arrays stored as separate entries is loaded back unchanged."""
+
+    monkeypatch.chdir(tmp_path)
+    args = butterfly_args()
+    data = {'nphi_list': np.linspace(0, 1, 12).reshape(3, 4), 'E_list': np.arange(12.).reshape(3, 4),
+            'chern_list': [[1, -2], [3]], 'matrix': None}
+    fu.save_data("butterfly", Hofstadter(1, 7, lat="square"), args, data)
+
+    with np.load(fu.create_filename("butterfly", args)+".npz", allow_pickle=True) as file_data:
+        assert "data_nphi_list" in file_data.files and "data_E_list" in file_data.files
+    model_load, args_load, data_load = fu.load_data("butterfly", fu.create_filename("butterfly", args)+".npz")
+
+    assert (model_load.p, model_load.q, model_load.lat) == (1, 7, "square")
+    assert args_load == args
+    assert data_load.keys() == data.keys()
+    assert np.array_equal(data_load['nphi_list'], data['nphi_list'])
+    assert np.array_equal(data_load['E_list'], data['E_list'])
+    assert data_load['chern_list'] == data['chern_list']
+    assert data_load['matrix'] is None
+
+
+def test_load_old_format(tmp_path, monkeypatch):
+    """Check that data files which store all entries in the pickled data dictionary can still be loaded."""
+
+    filename = os.path.join(os.path.dirname(os.path.abspath(__file__)), "butterfly", "butterfly_square_q_97_t_1.npz")
+    monkeypatch.chdir(tmp_path)
+    _, args, data = fu.load_data("butterfly", filename)
+
+    assert args['q'] == 97
+    assert np.shape(data['E_list']) == (96, 97)
+    assert data['matrix'] is None